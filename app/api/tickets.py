@@ -1,61 +1,89 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlmodel import Session, select, func
-from app.models.ticket import Ticket, TicketCreate, TicketResponse, TicketValidationRequest
+from fastapi import APIRouter, HTTPException, Depends, Query, Header, Body
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Literal, Optional, Union
+from app.models.ticket import Ticket, TicketCreate, TicketResponse, TicketValidationRequest, ScanBatchRequest, ScanBatchResponse, ScanResponse
 from app.models.user import User
-from app.services.qr import generate_qr
-from app.db.session import get_session
-from app.dependencies.auth import require_permission
-from datetime import datetime, timezone
+from app.services.qr import ticket_qr, qr_field, render_qr, MEDIA_TYPES
+from app.services.qr_payload import signer, qr_payload, InvalidPayload
+from app.services.numbering import ticket_numbers
+from app.services.scan import scan_ticket_once, apply_scan_batch, ScanResult
+from app.services.bulk_import import parse_rows, import_tickets
+from app.services.events import resolve_event_async, event_clause, UnknownEvent
+from app.services.export import export_query
+from app.services.pagination import (
+    paginate, InvalidCursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, PageOrder, PAGE_ORDER_DESCRIPTION,
+)
+from app.db.engine import engine
+from app.db.session import get_session, get_read_session, get_async_session
+from app.dependencies.auth import require_permission, require_permission_async
 import uuid
+import json
+import hashlib
 import logging
 import traceback
 
 router = APIRouter()
 log = logging.getLogger("uvicorn.error")
 
+MAX_SCAN_BATCH = 10000
+ScanFields = Literal["full", "lean"]
+SCAN_FIELDS_DESCRIPTION = "lean skips QR regeneration and returns only status, ticket_number, name, event and timestamp"
+SCAN_EVENT_DESCRIPTION = "The gate's event id: the database lookup only considers that event's tickets"
+# The image changes with the signing key id (QR_SIGNING_KEY_ID rotation) and the ticket's event,
+# so clients revalidate every use; an unchanged QR costs a 304 against the ETag
+QR_CACHE_CONTROL = "private, no-cache"
+
 # ---------------------------
 # Create Ticket (Public)
 # ---------------------------
 @router.post("/tickets", response_model=TicketResponse)
-def create_ticket(t: TicketCreate, session: Session = Depends(get_session)):
+async def create_ticket(t: TicketCreate, session: AsyncSession = Depends(get_async_session)):
     try:
-        existing = session.exec(
-            select(Ticket).where(
-                (Ticket.id_card_number == t.id_card_number) &
-                (Ticket.event == t.event)
+        try:
+            event_id, event = await resolve_event_async(session, t.event, t.event_id)
+        except UnknownEvent as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        existing = (await session.exec(
+            select(Ticket.ticket_id).where(
+                (Ticket.id_card_number == t.id_card_number) & event_clause(event, event_id)
             )
-        ).first()
+        )).first()
         if existing:
             raise HTTPException(status_code=400, detail="Ticket already exists for this ID and event")
 
         ticket_id = str(uuid.uuid4())
 
-        row = session.exec(select(func.max(Ticket.ticket_number))).one_or_none()
-        max_num_str = row[0] if isinstance(row, (tuple, list)) else row
-
-        try:
-            next_num = (int(max_num_str) + 1) if max_num_str else 1
-        except (ValueError, TypeError):
-            next_num = 1
-
         ticket = Ticket(
             ticket_id=ticket_id,
-            ticket_number=str(next_num).zfill(4),
+            ticket_number=await ticket_numbers.next_async(session),
             name=t.name,
             id_card_number=t.id_card_number,
             date_of_birth=t.date_of_birth,
             phone_number=t.phone_number,
-            event=t.event,
+            event=event,
+            event_id=event_id,
             used=False,
             scanned_at=None
         )
 
         session.add(ticket)
-        session.commit()
-        session.refresh(ticket)
+        try:
+            await session.commit()
+        except IntegrityError as e:
+            await session.rollback()
+            # Lost a race with a concurrent registration of the same ID (uq_ticket_id_card_number_event[_id])
+            if "id_card_number" not in str(e.orig):
+                raise
+            raise HTTPException(status_code=400, detail="Ticket already exists for this ID and event")
 
         try:
-            qr = generate_qr(ticket.ticket_id)
+            qr = await run_in_threadpool(ticket_qr, ticket.ticket_id, ticket.event)
         except Exception as e:
             log.exception("QR generation failed for ticket_id=%s: %s", ticket.ticket_id, e)
             qr = ""
@@ -70,78 +98,77 @@ def create_ticket(t: TicketCreate, session: Session = Depends(get_session)):
             qr=qr,
             status="valid",
             event=ticket.event,
-            timestamp=""
+            event_id=ticket.event_id,
+            timestamp=None
         )
     except HTTPException:
         raise
     except Exception as e:
         try:
-            session.rollback()
+            await session.rollback()
         except Exception:
             pass
         log.error("Error in /tickets: %s", e)
         traceback.print_exc()
         raise HTTPException(status_code=500, detail="Internal server error")
 
+# ---------------------------
+# Bulk Import Tickets (Admin)
+# ---------------------------
+@router.post("/tickets/bulk")
+def bulk_create_tickets(
+    data: bytes = Body(..., media_type="application/x-ndjson"),
+    content_type: Optional[str] = Header(None),
+    importer: User = Depends(require_permission("import_tickets")),
+):
+    """
+    Import tickets from a JSON lines or CSV (Content-Type: text/csv) body.
+    Rows are inserted in batches and one JSON result per row is streamed back.
+    """
+    rows = parse_rows(data, content_type)
+
+    def stream():
+        with Session(engine) as session:
+            try:
+                for result in import_tickets(session, rows):
+                    yield json.dumps(result) + "\n"
+            except Exception as e:
+                session.rollback()
+                log.error("Error in /tickets/bulk: %s", e)
+                traceback.print_exc()
+                yield json.dumps({"status": "error", "detail": "Import aborted, remaining rows were not imported"}) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
 # ---------------------------
 # Validate Ticket (Scanner)
 # ---------------------------
-@router.post("/validate_ticket", response_model=TicketResponse)
-def validate_ticket(
+@router.post("/validate_ticket", response_model=Union[TicketResponse, ScanResponse])
+async def validate_ticket(
     body: TicketValidationRequest,
-    session: Session = Depends(get_session),
-    scanner: User = Depends(require_permission("scan_ticket"))
+    fields: ScanFields = Query("full", description=SCAN_FIELDS_DESCRIPTION),
+    event_id: Optional[str] = Query(None, description=SCAN_EVENT_DESCRIPTION),
+    session: AsyncSession = Depends(get_async_session),
+    scanner: User = Depends(require_permission_async("scan_ticket"))
 ):
     try:
-        ticket_id = (body.payload or "").strip()
-        if not ticket_id:
+        payload = (body.payload or "").strip()
+        if not payload:
             raise HTTPException(status_code=400, detail="Invalid payload")
 
-        result = session.exec(select(Ticket).where(Ticket.ticket_id == ticket_id)).first()
-        if not result:
-            raise HTTPException(status_code=404, detail="Ticket not found")
-
-        if result.used:
-            return TicketResponse(
-                ticket_number=result.ticket_number,
-                name=result.name,
-                id_card_number=result.id_card_number,
-                date_of_birth=result.date_of_birth,
-                phone_number=result.phone_number,
-                ticket_id=result.ticket_id,
-                qr=generate_qr(result.ticket_id),
-                status="already_checked_in",
-                event=result.event,
-                timestamp=result.scanned_at
-            )
-
-        result.used = True
-        result.scanned_at = datetime.now(timezone.utc).isoformat()
-
-        if hasattr(result, "scanned_by"):
-            result.scanned_by = scanner.id
-
-        session.add(result)
-        session.commit()
-        session.refresh(result)
+        # Forged or garbage codes are rejected here, before any database access
+        try:
+            ticket_id = signer.verify(payload).ticket_id
+        except InvalidPayload:
+            raise HTTPException(status_code=400, detail="Invalid payload")
 
-        return TicketResponse(
-            ticket_number=result.ticket_number,
-            name=result.name,
-            id_card_number=result.id_card_number,
-            date_of_birth=result.date_of_birth,
-            phone_number=result.phone_number,
-            ticket_id=result.ticket_id,
-            qr=generate_qr(result.ticket_id),
-            status="valid",
-            event=result.event,
-            timestamp=result.scanned_at
-        )
+        result = await session.run_sync(scan_ticket_once, ticket_id, scanner.id, event_id)
+        return await _scan_response(result, fields)
     except HTTPException:
         raise
     except Exception as e:
         try:
-            session.rollback()
+            await session.rollback()
         except Exception:
             pass
         log.error("Error in /validate_ticket: %s", e)
@@ -149,66 +176,90 @@ def validate_ticket(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 # ---------------------------
-# NEW: Scan Ticket by Path Param (Scanner)
+# Offline Batch Scan Sync (Scanner)
 # ---------------------------
-@router.post("/scan/{ticket_id}", response_model=TicketResponse)
-def scan_ticket(
-    ticket_id: str,
+@router.post("/scan/batch", response_model=ScanBatchResponse)
+def scan_batch(
+    body: ScanBatchRequest,
+    event_id: Optional[str] = Query(None, description=SCAN_EVENT_DESCRIPTION),
     session: Session = Depends(get_session),
     scanner: User = Depends(require_permission("scan_ticket"))
 ):
-    try:
-        result = session.exec(select(Ticket).where(Ticket.ticket_id == ticket_id)).first()
-        if not result:
-            raise HTTPException(status_code=404, detail="Ticket not found")
-
-        if result.used:
-            return TicketResponse(
-                ticket_number=result.ticket_number,
-                name=result.name,
-                id_card_number=result.id_card_number,
-                date_of_birth=result.date_of_birth,
-                phone_number=result.phone_number,
-                ticket_id=result.ticket_id,
-                qr=generate_qr(result.ticket_id),
-                status="already_checked_in",
-                event=result.event,
-                timestamp=result.scanned_at
-            )
-
-        result.used = True
-        result.scanned_at = datetime.now(timezone.utc).isoformat()
-
-        if hasattr(result, "scanned_by"):
-            result.scanned_by = scanner.id
+    """
+    Sync scans a device buffered while offline.
+    The earliest scan of each ticket wins; every record gets its own outcome.
+    """
+    if len(body.scans) > MAX_SCAN_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_SCAN_BATCH} scans per batch")
 
-        session.add(result)
-        session.commit()
-        session.refresh(result)
+    try:
+        return ScanBatchResponse(results=apply_scan_batch(session, body.scans, scanner.id, event_id))
+    except Exception as e:
+        try:
+            session.rollback()
+        except Exception:
+            pass
+        log.error("Error in /scan/batch: %s", e)
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Internal server error")
 
-        return TicketResponse(
-            ticket_number=result.ticket_number,
-            name=result.name,
-            id_card_number=result.id_card_number,
-            date_of_birth=result.date_of_birth,
-            phone_number=result.phone_number,
-            ticket_id=result.ticket_id,
-            qr=generate_qr(result.ticket_id),
-            status="valid",
-            event=result.event,
-            timestamp=result.scanned_at
-        )
+# ---------------------------
+# NEW: Scan Ticket by Path Param (Scanner)
+# ---------------------------
+@router.post("/scan/{ticket_id}", response_model=Union[TicketResponse, ScanResponse])
+async def scan_ticket(
+    ticket_id: str,
+    fields: ScanFields = Query("full", description=SCAN_FIELDS_DESCRIPTION),
+    event_id: Optional[str] = Query(None, description=SCAN_EVENT_DESCRIPTION),
+    session: AsyncSession = Depends(get_async_session),
+    scanner: User = Depends(require_permission_async("scan_ticket"))
+):
+    try:
+        result = await session.run_sync(scan_ticket_once, ticket_id, scanner.id, event_id)
+        return await _scan_response(result, fields)
     except HTTPException:
         raise
     except Exception as e:
         try:
-            session.rollback()
+            await session.rollback()
         except Exception:
             pass
         log.error("Error in /scan/{ticket_id}: %s", e)
         traceback.print_exc()
         raise HTTPException(status_code=500, detail="Internal server error")
 
+async def _scan_response(result: ScanResult, fields: str = "full"):
+    """
+    Map a scan outcome to the scanner response, 404 when the ticket does not exist.
+    The lean form skips QR generation entirely; the full form renders it off the event loop.
+    """
+    if result.status == "not_found":
+        raise HTTPException(status_code=404, detail="Ticket not found")
+
+    ticket = result.ticket
+    if fields == "lean":
+        return ScanResponse(
+            status=result.status,
+            ticket_number=ticket.ticket_number,
+            name=ticket.name,
+            event=ticket.event,
+            timestamp=ticket.scanned_at
+        )
+
+    return TicketResponse(
+        ticket_number=ticket.ticket_number,
+        name=ticket.name,
+        id_card_number=ticket.id_card_number,
+        date_of_birth=ticket.date_of_birth,
+        phone_number=ticket.phone_number,
+        ticket_id=ticket.ticket_id,
+        qr=await run_in_threadpool(ticket_qr, ticket.ticket_id, ticket.event),
+        status=result.status,
+        event=ticket.event,
+        event_id=ticket.event_id,
+        timestamp=ticket.scanned_at
+    )
+
 # ---------------------------
 # Health Check
 # ---------------------------
@@ -221,10 +272,30 @@ def health():
 # ---------------------------
 @router.get("/tickets/all", response_model=list[TicketResponse])
 def get_all_tickets(
-    session: Session = Depends(get_session),
+    response: Response,
+    qr: Literal["inline", "url", "none"] = Query("inline", description="How to deliver each ticket's QR code"),
+    used: Optional[bool] = Query(None),
+    event: Optional[str] = Query(None, description="Event id or name"),
+    scanned_by: Optional[str] = Query(None),
+    start: Optional[datetime] = Query(None, description="Scanned at or after (ISO 8601; no offset means UTC)"),
+    end: Optional[datetime] = Query(None, description="Scanned at or before (ISO 8601; no offset means UTC)"),
+    order: PageOrder = Query("ticket_id", description=PAGE_ORDER_DESCRIPTION),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description=f"{NEXT_CURSOR_HEADER} of the previous page"),
+    session: Session = Depends(get_read_session),
     viewer: User = Depends(require_permission("scan_ticket"))
 ):
-    tickets = session.exec(select(Ticket)).all()
+    """
+    One page of tickets in keyset order; the next page's cursor is in the X-Next-Cursor header,
+    which is absent on the last page.
+    """
+    query = export_query(session, used, event, scanned_by, start, end)
+    try:
+        tickets, next_cursor = paginate(session, query, order, limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return [
         TicketResponse(
             ticket_number=t.ticket_number,
@@ -233,28 +304,60 @@ def get_all_tickets(
             date_of_birth=t.date_of_birth,
             phone_number=t.phone_number,
             ticket_id=t.ticket_id,
-            qr=generate_qr(t.ticket_id),
+            qr=qr_field(t.ticket_id, t.event, qr),
             status="already_checked_in" if t.used else "valid",
             event=t.event,
+            event_id=t.event_id,
             timestamp=t.scanned_at
         )
         for t in tickets
     ]
+
+# ---------------------------
+# Ticket QR Image (binary, cacheable)
+# ---------------------------
+@router.get("/tickets/{ticket_id}/qr.{fmt}")
+def get_ticket_qr(
+    ticket_id: str,
+    fmt: Literal["png", "svg"],
+    if_none_match: Optional[str] = Header(None),
+    session: Session = Depends(get_session),
+    viewer: User = Depends(require_permission("scan_ticket")),
+):
+    """
+    Return the raw QR image for a ticket with a strong ETag,
+    so clients only download it when they actually display it.
+    """
+    ticket = session.exec(select(Ticket.ticket_id, Ticket.event).where(Ticket.ticket_id == ticket_id)).first()
+    if not ticket:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+
+    body = render_qr(qr_payload(ticket.ticket_id, ticket.event), fmt=fmt)
+    etag = f'"{hashlib.sha256(body).hexdigest()}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": QR_CACHE_CONTROL,
+    }
+
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type=MEDIA_TYPES[fmt], headers=headers)
 # ---------------------------
 # Get Single Ticket (Viewer/Admin)
 # ---------------------------
 @router.get("/tickets/{ticket_id}", response_model=TicketResponse)
-def get_ticket(
+async def get_ticket(
     ticket_id: str,
-    session: Session = Depends(get_session),
-    viewer: User = Depends(require_permission("view_ticket")),
+    session: AsyncSession = Depends(get_async_session),
+    viewer: User = Depends(require_permission_async("view_ticket")),
 ):
     """
     Retrieve a single ticket by its ID.
     Requires 'view_ticket' permission.
     """
     try:
-        ticket = session.exec(select(Ticket).where(Ticket.ticket_id == ticket_id)).first()
+        ticket = (await session.exec(select(Ticket).where(Ticket.ticket_id == ticket_id))).first()
         if not ticket:
             raise HTTPException(status_code=404, detail="Ticket not found")
 
@@ -265,9 +368,10 @@ def get_ticket(
             date_of_birth=ticket.date_of_birth,
             phone_number=ticket.phone_number,
             ticket_id=ticket.ticket_id,
-            qr=generate_qr(ticket.ticket_id),
+            qr=await run_in_threadpool(ticket_qr, ticket.ticket_id, ticket.event),
             status="already_checked_in" if ticket.used else "valid",
             event=ticket.event,
+            event_id=ticket.event_id,
             timestamp=ticket.scanned_at
         )
     except HTTPException:
@@ -1,6 +1,106 @@
 import os
+from typing import Dict, Tuple
 from sqlmodel import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+from app.db.pool import PoolMetrics, timed_pool_class, instrument, pool_stats
 
 # No fallback—forces explicit env setup
 DATABASE_URL = os.environ["DATABASE_URL"]
-engine = create_engine(DATABASE_URL, echo=True)
+
+# Async drivers for the same database, used by the ticket hot paths
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def async_database_url(url: str) -> str:
+    """Swap the sync driver in DATABASE_URL for its asyncio counterpart."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if parsed.get_driver_name() in ("asyncpg", "psycopg", "aiosqlite"):
+        return url
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}")
+    query = dict(parsed.query)
+    if backend != "sqlite" and "sslmode" in query:
+        # asyncpg takes libpq's sslmode values under the name "ssl"
+        query["ssl"] = query.pop("sslmode")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend], query=query).render_as_string(hide_password=False)
+
+
+# ---------------------------
+# Engine factory
+# ---------------------------
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes")
+
+def _echo_setting():
+    """DB_ECHO: off (default), true / info, or debug (also logs result rows)."""
+    value = os.getenv("DB_ECHO", "false").lower()
+    if value == "debug":
+        return "debug"
+    return value in ("1", "true", "yes", "info")
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """
+    create_engine keyword arguments from the environment:
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING,
+    DB_STATEMENT_TIMEOUT_MS (Postgres only, 0 disables) and DB_ECHO.
+    """
+    options = {"echo": _echo_setting()}
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        return options
+
+    options.update(
+        pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        pool_pre_ping=_env_bool("DB_POOL_PRE_PING", True),
+    )
+
+    statement_timeout = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+    if statement_timeout > 0 and backend in ("postgresql", "postgres"):
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(statement_timeout)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout}"}
+    return options
+
+def _pool_class(url: str, base, metrics: PoolMetrics) -> dict:
+    # SQLite keeps SQLAlchemy's default pool (in-memory databases need a singleton connection)
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {"poolclass": timed_pool_class(base, metrics)}
+
+# name -> (sync Engine, metrics); engine.pool is read at report time since dispose() replaces it
+_registry: Dict[str, Tuple[Engine, PoolMetrics]] = {}
+
+def make_engine(url: str, name: str = "primary") -> Engine:
+    metrics = PoolMetrics()
+    new_engine = create_engine(url, **_pool_class(url, QueuePool, metrics), **engine_options(url))
+    instrument(new_engine, metrics)
+    _registry[name] = (new_engine, metrics)
+    return new_engine
+
+def make_async_engine(url: str, name: str = "primary_async") -> AsyncEngine:
+    metrics = PoolMetrics()
+    new_engine = create_async_engine(url, **_pool_class(url, AsyncAdaptedQueuePool, metrics), **engine_options(url, is_async=True))
+    instrument(new_engine.sync_engine, metrics)
+    _registry[name] = (new_engine.sync_engine, metrics)
+    return new_engine
+
+def db_pool_stats() -> dict:
+    """Pool occupancy plus acquire latency and timeouts for every engine this worker created."""
+    return {name: pool_stats(registered.pool, metrics) for name, (registered, metrics) in _registry.items()}
+
+
+engine = make_engine(DATABASE_URL)
+
+DATABASE_ASYNC_URL = os.getenv("DATABASE_ASYNC_URL") or async_database_url(DATABASE_URL)
+async_engine = make_async_engine(DATABASE_ASYNC_URL)
@@ -0,0 +1,138 @@
+import hashlib
+import logging
+import os
+import uuid
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+
+log = logging.getLogger("uvicorn.error")
+
+# On Postgres migrated past b5e8d2c41f93, ticket is LIST-partitioned by event_id:
+# one partition per event plus a default partition for tickets not linked to an event.
+# The default partition carries CHECK (event_id IS NULL) (migration a3f9c2e71b64), which lets
+# ATTACH PARTITION skip scanning it when a new event's partition is added.
+# Other databases (SQLite in development) keep a plain table and every helper here is a no-op.
+PARENT = "ticket"
+PREFIX = "ticket_e_"
+DEFAULT_PARTITION = "ticket_unassigned"
+DEFAULT_CHECK = f"{DEFAULT_PARTITION}_event_id_null"
+# How long DETACH may wait for its ACCESS EXCLUSIVE lock on ticket before giving up
+DETACH_LOCK_TIMEOUT_MS = int(os.getenv("PARTITION_DETACH_LOCK_TIMEOUT_MS", "2000"))
+LOCK_NOT_AVAILABLE = "55P03"
+
+
+class PartitionBusy(RuntimeError):
+    pass
+
+
+def partition_name(event_id: str) -> str:
+    """ticket_e_<32 hex>: the event UUID, or a digest for ids that are not UUIDs; always within 63 bytes."""
+    try:
+        suffix = uuid.UUID(event_id).hex
+    except ValueError:
+        suffix = hashlib.md5(event_id.encode("utf-8")).hexdigest()
+    return PREFIX + suffix
+
+
+def _literal(value: str) -> str:
+    # Partition bounds are DDL, which takes no bind parameters
+    return "'" + value.replace("'", "''") + "'"
+
+
+def is_partitioned(conn: Connection) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return conn.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:parent))"),
+        {"parent": PARENT},
+    ).scalar()
+
+
+def has_partition(conn: Connection, event_id: str) -> bool:
+    return conn.execute(
+        text("SELECT to_regclass(:name) IS NOT NULL"), {"name": partition_name(event_id)}
+    ).scalar()
+
+
+def partition_ddl(event_id: str) -> list:
+    """
+    Statements creating an event's partition. Uniqueness of ticket_id and ticket_number is
+    per partition: both are generated (uuid4 and the ticket counter), never client-supplied.
+    The table is built standalone and then attached: ATTACH PARTITION only takes SHARE UPDATE
+    EXCLUSIVE on ticket, where CREATE TABLE ... PARTITION OF takes ACCESS EXCLUSIVE.
+    """
+    name = partition_name(event_id)
+    return [
+        f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)",
+        f"ALTER TABLE {name} ADD CONSTRAINT {name}_pkey PRIMARY KEY (ticket_id)",
+        f"CREATE UNIQUE INDEX {name}_ticket_number ON {name} (ticket_number)",
+        f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES IN ({_literal(event_id)})",
+    ]
+
+
+def default_partition_ddl() -> list:
+    """The default partition, constrained to tickets without an event_id."""
+    return [
+        f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARENT} DEFAULT",
+        f"ALTER TABLE {DEFAULT_PARTITION} ADD CONSTRAINT {DEFAULT_CHECK} CHECK (event_id IS NULL)",
+    ]
+
+
+def create_partition(conn: Connection, event_id: str) -> Optional[str]:
+    """
+    Give a new event its own partition, before any ticket is linked to it.
+    Returns the partition name, or None when ticket is not partitioned or it already exists.
+    """
+    if not is_partitioned(conn) or has_partition(conn, event_id):
+        return None
+    for statement in partition_ddl(event_id):
+        conn.execute(text(statement))
+    log.info("Created ticket partition %s for event %s", partition_name(event_id), event_id)
+    return partition_name(event_id)
+
+
+def truncate_partition(conn: Connection, event_id: str) -> bool:
+    """Delete every ticket of an event by truncating its partition; False when there is none to truncate."""
+    if not is_partitioned(conn) or not has_partition(conn, event_id):
+        return False
+    conn.execute(text(f"TRUNCATE {partition_name(event_id)}"))
+    return True
+
+
+def detach_partition(conn: Connection, event_id: str) -> Optional[str]:
+    """
+    Take an event's tickets out of ticket without touching a row: the partition is detached and
+    kept as a standalone archive table, which can be dropped once it is no longer needed.
+    Its event foreign key is dropped so deleting the event afterwards leaves the archive alone.
+
+    DETACH takes ACCESS EXCLUSIVE on ticket until the caller's transaction ends, so every scan
+    waits while it is held. DETACH ... CONCURRENTLY would avoid that but is not allowed next to
+    a DEFAULT partition. Instead the lock is waited for at most DETACH_LOCK_TIMEOUT_MS (an open
+    export or live reload would otherwise queue every later scan behind it), then PartitionBusy.
+    """
+    if not is_partitioned(conn) or not has_partition(conn, event_id):
+        return None
+    name = partition_name(event_id)
+    conn.execute(text(f"SET LOCAL lock_timeout = {DETACH_LOCK_TIMEOUT_MS}"))
+    try:
+        conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+    except OperationalError as e:
+        if getattr(e.orig, "pgcode", None) == LOCK_NOT_AVAILABLE:
+            raise PartitionBusy(f"ticket is in use, {name} was not detached; retry later")
+        raise
+    constraints = conn.execute(
+        text(
+            """
+            SELECT conname FROM pg_constraint
+            WHERE conrelid = to_regclass(:name) AND contype = 'f' AND confrelid = to_regclass('event')
+            """
+        ),
+        {"name": name},
+    ).scalars().all()
+    for constraint in constraints:
+        conn.execute(text(f'ALTER TABLE {name} DROP CONSTRAINT "{constraint}"'))
+    log.info("Detached ticket partition %s for event %s", name, event_id)
+    return name
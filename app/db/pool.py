@@ -0,0 +1,91 @@
+import time
+import threading
+from collections import deque
+from typing import Type
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import Pool
+
+from app.utils.metrics import latency_summary
+
+ACQUIRE_SAMPLES = 1024
+
+
+class PoolMetrics:
+    """Counters for one connection pool, fed by the timed pool class and pool events."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._acquire: deque = deque(maxlen=ACQUIRE_SAMPLES)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidated = 0
+
+    def record_acquire(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self._acquire.append(seconds)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "invalidated": self.invalidated,
+                "acquire_ms": latency_summary(self._acquire),
+            }
+
+
+class _TimedPool:
+    """Mixin timing Pool.connect(), i.e. how long callers wait for a usable connection."""
+
+    metrics: PoolMetrics
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_acquire(time.perf_counter() - started)
+        return connection
+
+
+def timed_pool_class(base: Type[Pool], metrics: PoolMetrics) -> Type[Pool]:
+    """
+    Subclass of `base` that reports into `metrics`.
+    Metrics are bound on the class so they survive Pool.recreate().
+    """
+    return type(f"Timed{base.__name__}", (_TimedPool, base), {"metrics": metrics})
+
+
+def instrument(target, metrics: PoolMetrics) -> None:
+    """Count new and invalidated DBAPI connections; `target` is an Engine or Pool."""
+    @event.listens_for(target, "connect")
+    def _connect(dbapi_connection, connection_record):
+        metrics.connects += 1
+
+    @event.listens_for(target, "invalidate")
+    def _invalidate(dbapi_connection, connection_record, exception):
+        metrics.invalidated += 1
+
+
+def pool_stats(pool: Pool, metrics: PoolMetrics) -> dict:
+    stats = {"pool_class": type(pool).__name__}
+    # QueuePool and its async variant expose sizing; SQLite's static/singleton pools do not
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    if "size" in stats:
+        stats["max_overflow"] = getattr(pool, "_max_overflow", None)
+        stats["timeout"] = getattr(pool, "_timeout", None)
+    stats.update(metrics.snapshot())
+    return stats
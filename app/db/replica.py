@@ -0,0 +1,171 @@
+import os
+import time
+import logging
+import threading
+from http.cookies import SimpleCookie
+from typing import Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.db.engine import engine, make_engine
+from app.utils.auth import decode_token
+
+log = logging.getLogger("uvicorn.error")
+
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+replica_engine: Optional[Engine] = make_engine(DATABASE_REPLICA_URL, name="replica") if DATABASE_REPLICA_URL else None
+
+# Set on responses to successful writes; its value is the write time (epoch seconds)
+PIN_COOKIE = "db_last_write"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Postgres standby lag in seconds; 0 when fully replayed or when the server is not a standby
+LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+def _token_user_id(authorization: Optional[str]) -> Optional[str]:
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        return str(decode_token(authorization[7:].strip()).get("sub") or "") or None
+    except Exception:
+        return None
+
+
+class ReadRouter:
+    """
+    Chooses the engine for read-only endpoints.
+    Reads go to the replica unless it is lagging by more than `max_lag` seconds,
+    unreachable, or the caller wrote something within the last `pin_seconds`
+    (tracked per user in this worker and via PIN_COOKIE across workers).
+    """
+
+    def __init__(self, primary: Engine, replica: Optional[Engine], max_lag: float = 5.0,
+                 check_interval: float = 2.0, pin_seconds: float = 5.0):
+        self.primary = primary
+        self.replica = replica
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.pin_seconds = pin_seconds
+        self._lock = threading.Lock()
+        self._checked_at: Optional[float] = None
+        self._usable = False
+        self._lag: Optional[float] = None
+        self._writes: Dict[str, float] = {}
+        self.routed = {"replica": 0, "pinned": 0, "lagging": 0, "no_replica": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.replica is not None
+
+    def _replica_usable(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.check_interval:
+                return self._usable
+            # Claim this check; concurrent callers keep using the previous answer
+            self._checked_at = now
+        try:
+            with self.replica.connect() as conn:
+                lag = float(conn.execute(LAG_QUERY).scalar() or 0) if self.replica.dialect.name == "postgresql" else 0.0
+            usable = lag <= self.max_lag
+        except Exception as e:
+            log.error(f"Replica health check failed, reading from primary: {e}")
+            lag, usable = None, False
+        with self._lock:
+            self._lag, self._usable = lag, usable
+        return usable
+
+    def note_write(self, user_id: Optional[str]) -> None:
+        if user_id:
+            now = time.time()
+            with self._lock:
+                self._writes[user_id] = now
+                if len(self._writes) > 10000:
+                    cutoff = now - self.pin_seconds
+                    self._writes = {k: v for k, v in self._writes.items() if v >= cutoff}
+
+    def _pinned(self, user_id: Optional[str], cookie_value: Optional[str]) -> bool:
+        cutoff = time.time() - self.pin_seconds
+        with self._lock:
+            if user_id and self._writes.get(user_id, 0) >= cutoff:
+                return True
+        try:
+            return cookie_value is not None and float(cookie_value) >= cutoff
+        except ValueError:
+            return False
+
+    def choose(self, authorization: Optional[str], cookie_value: Optional[str]):
+        """(engine, route name) for one read request."""
+        if not self.enabled:
+            route = "no_replica"
+        elif self._pinned(_token_user_id(authorization), cookie_value):
+            route = "pinned"
+        elif not self._replica_usable():
+            route = "lagging"
+        else:
+            route = "replica"
+        with self._lock:
+            self.routed[route] += 1
+        return (self.replica if route == "replica" else self.primary), route
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "replica_configured": self.enabled,
+                "replica_usable": self._usable if self.enabled else False,
+                "replica_lag_seconds": self._lag,
+                "max_lag_seconds": self.max_lag,
+                "pin_seconds": self.pin_seconds,
+                "routed": dict(self.routed),
+            }
+
+
+read_router = ReadRouter(
+    primary=engine,
+    replica=replica_engine,
+    max_lag=float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5")),
+    check_interval=float(os.getenv("REPLICA_LAG_CHECK_INTERVAL", "2")),
+    pin_seconds=float(os.getenv("REPLICA_PIN_SECONDS", "5")),
+)
+
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI middleware that records successful non-GET requests, so the same user's
+    next reads within REPLICA_PIN_SECONDS are served by the primary.
+    Does nothing when no replica is configured.
+    """
+
+    def __init__(self, app, router: ReadRouter = read_router):
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.router.enabled or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = dict((k.decode("latin-1").lower(), v.decode("latin-1")) for k, v in scope.get("headers", []))
+                self.router.note_write(_token_user_id(headers.get("authorization")))
+                cookie = SimpleCookie()
+                cookie[PIN_COOKIE] = str(int(time.time()) + 1)
+                cookie[PIN_COOKIE]["max-age"] = str(int(self.router.pin_seconds) + 1)
+                cookie[PIN_COOKIE]["path"] = "/"
+                cookie[PIN_COOKIE]["httponly"] = True
+                cookie[PIN_COOKIE]["samesite"] = "Lax"
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"set-cookie", cookie[PIN_COOKIE].OutputString().encode("latin-1"))
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,62 @@
+import ast
+from pathlib import Path
+from typing import Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+VERSIONS_DIR = Path(__file__).resolve().parents[2] / "migrations" / "versions"
+
+
+def _revision_ids(path: Path):
+    """(revision, down_revisions) declared at module level of a migration file."""
+    revision, down = None, ()
+    for node in ast.parse(path.read_text(encoding="utf-8")).body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1:
+            target, value = node.targets[0], node.value
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            target, value = node.target, node.value
+        else:
+            continue
+        if not isinstance(target, ast.Name):
+            continue
+        if target.id == "revision":
+            revision = ast.literal_eval(value)
+        elif target.id == "down_revision":
+            parent = ast.literal_eval(value)
+            down = tuple(parent) if isinstance(parent, (list, tuple)) else ((parent,) if parent else ())
+    return revision, down
+
+
+def migration_heads(versions_dir: Path = VERSIONS_DIR) -> Set[str]:
+    """
+    Head revision(s) of the migration scripts.
+    Read with `ast` instead of alembic's ScriptDirectory, which costs far more to import than the check itself.
+    """
+    revisions, parents = set(), set()
+    for path in versions_dir.glob("*.py"):
+        revision, down = _revision_ids(path)
+        if revision:
+            revisions.add(revision)
+            parents.update(down)
+    return revisions - parents
+
+
+def database_revisions(engine: Engine) -> Optional[Set[str]]:
+    """Revisions stamped in alembic_version, or None if the table does not exist."""
+    try:
+        with engine.connect() as conn:
+            return {row[0] for row in conn.execute(text("SELECT version_num FROM alembic_version"))}
+    except Exception:
+        return None
+
+
+def check_schema(engine: Engine) -> str:
+    """
+    Compare the database with the migration scripts in a single query.
+    Returns "current", "behind" (or diverged), or "unversioned" when alembic_version is missing.
+    """
+    stamped = database_revisions(engine)
+    if stamped is None:
+        return "unversioned"
+    return "current" if stamped == migration_heads() else "behind"
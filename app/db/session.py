@@ -1,6 +1,21 @@
+from fastapi import Request, Response
 from sqlmodel import Session
-from app.db.engine import engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.db.engine import engine, async_engine
+from app.db.replica import read_router, PIN_COOKIE
 
 def get_session():
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
+
+def get_read_session(request: Request, response: Response):
+    """Session for read-only endpoints; served by DATABASE_REPLICA_URL when it is fresh enough."""
+    bind, route = read_router.choose(request.headers.get("authorization"), request.cookies.get(PIN_COOKIE))
+    response.headers["X-DB-Route"] = route
+    with Session(bind) as session:
+        yield session
+
+async def get_async_session():
+    # expire_on_commit=False: attribute access after commit must not trigger implicit IO
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
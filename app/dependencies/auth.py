@@ -1,48 +1,120 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlmodel import Session, select
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Literal, NamedTuple, Optional
 from app.models.user import User
-from app.db.session import get_session
-from app.utils.roles import has_permission  # pure function, no FastAPI imports
+from app.db.session import get_session, get_async_session
+from app.utils.roles import mask_allows, permission_mask, PERMISSIONS_VERSION  # pure functions, no FastAPI imports
+from app.services.user_cache import user_cache
 import os
+import time
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/admin/login")
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    session: Session = Depends(get_session)
-) -> User:
-    credentials_exception = HTTPException(
+class TokenClaims(NamedTuple):
+    user_id: str
+    token_version: int
+    role: Optional[str]
+    permissions: Optional[int]  # role bitmask, None unless the permission claim can be trusted
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid or expired token"
     )
 
+
+def _decode_claims(token: str) -> TokenClaims:
+    """Validate an access token and return its claims."""
     try:
         payload = jwt.decode(token, os.getenv("JWT_SECRET"), algorithms=["HS256"])
         sub = payload.get("sub")
         if sub is None:
-            raise credentials_exception
+            raise _credentials_exception()
         user_id = str(sub)
 
         ver_claim = payload.get("ver", payload.get("token_version"))
         if ver_claim is None:
-            raise credentials_exception
+            raise _credentials_exception()
         token_ver = int(ver_claim)
+
+        # Permission claims are trusted until perm_exp, unless the user changed since the token was issued
+        permissions = None
+        mask, perm_exp = payload.get("perm"), payload.get("perm_exp")
+        if (
+            mask is not None
+            and perm_exp is not None
+            and payload.get("perm_v") == PERMISSIONS_VERSION
+            and time.time() < float(perm_exp)
+            and not user_cache.revoked(user_id, float(payload.get("iat", 0)))
+        ):
+            permissions = int(mask)
     except (JWTError, ValueError, TypeError):
-        raise credentials_exception
+        raise _credentials_exception()
+    return TokenClaims(user_id, token_ver, payload.get("role"), permissions)
 
-    user = session.get(User, user_id)
-    if not user:
-        user = session.exec(select(User).where(User.id == user_id)).first()
 
-    if not user or user.token_version != token_ver:
-        raise credentials_exception
+def _check_user(user, token_ver: int) -> User:
+    if not user or user.token_version != token_ver or user.is_active is False:
+        raise _credentials_exception()
+    return user
 
+
+def _claims_user(claims: TokenClaims) -> User:
+    """Transient User built from token claims alone; only id, role and token_version are meaningful."""
+    return User(id=claims.user_id, email="", hashed_password="", role=claims.role, token_version=claims.token_version)
+
+
+def _authorize(user: User, mask: int, action: str) -> User:
+    if not mask_allows(mask, action):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"User role '{getattr(user.role, 'value', user.role)}' does not have permission to '{action}'"
+        )
     return user
 
 
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    session: Session = Depends(get_session)
+) -> User:
+    claims = _decode_claims(token)
+    return _load_user(session, claims)
+
+
+def _load_user(session: Session, claims: TokenClaims) -> User:
+    user = user_cache.get(claims.user_id)
+    if user is None:
+        user = session.get(User, claims.user_id)
+        if user:
+            user_cache.put(user)
+
+    return _check_user(user, claims.token_version)
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    session: AsyncSession = Depends(get_async_session)
+) -> User:
+    """Async variant of get_current_user for native async routes; shares the route's AsyncSession."""
+    claims = _decode_claims(token)
+    return await _load_user_async(session, claims)
+
+
+async def _load_user_async(session: AsyncSession, claims: TokenClaims) -> User:
+    user = user_cache.get(claims.user_id)
+    if user is None:
+        user = await session.get(User, claims.user_id)
+        if user:
+            user_cache.put(user)
+
+    return _check_user(user, claims.token_version)
+
+
 def require_admin(user: User = Depends(get_current_user)) -> User:
     """Dependency that ensures the current user is an admin."""
     if getattr(user, "role", None) != "admin":
@@ -53,13 +125,35 @@ def require_admin(user: User = Depends(get_current_user)) -> User:
     return user
 
 
-def require_permission(action: str):
-    """Factory that returns a dependency enforcing a specific permission."""
-    def permission_dependency(user: User = Depends(get_current_user)) -> User:
-        if not has_permission(user.role, action):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"User role '{user.role}' does not have permission to '{action}'"
-            )
-        return user
+def require_permission(action: str, scope: Optional[Literal["function", "request"]] = None):
+    """
+    Factory that returns a dependency enforcing a specific permission.
+    Tokens with a fresh permission claim are authorized without touching the database;
+    otherwise the user is loaded (through the user cache) and checked by role.
+    Streaming routes pass scope="function" so that lookup's session is closed before
+    the body is sent, instead of staying idle in a transaction until the stream ends.
+    """
+    def permission_dependency(
+        token: str = Depends(oauth2_scheme),
+        session: Session = Depends(get_session, scope=scope),
+    ) -> User:
+        claims = _decode_claims(token)
+        if claims.permissions is not None:
+            return _authorize(_claims_user(claims), claims.permissions, action)
+        user = _load_user(session, claims)
+        return _authorize(user, permission_mask(user.role), action)
+    return permission_dependency
+
+
+def require_permission_async(action: str):
+    """Like require_permission, for routes that run on the async engine."""
+    async def permission_dependency(
+        token: str = Depends(oauth2_scheme),
+        session: AsyncSession = Depends(get_async_session),
+    ) -> User:
+        claims = _decode_claims(token)
+        if claims.permissions is not None:
+            return _authorize(_claims_user(claims), claims.permissions, action)
+        user = await _load_user_async(session, claims)
+        return _authorize(user, permission_mask(user.role), action)
     return permission_dependency
@@ -1,6 +1,9 @@
 import os
+import time
 import logging
 from dotenv import load_dotenv
+
+_boot_started = time.perf_counter()
 from contextlib import asynccontextmanager
 
 # Configure logging
@@ -55,16 +58,54 @@ uploads_router = safe_import_router("app.routes.uploads", "Uploads")
 render_router = safe_import_router("app.routes.render", "Render")
 files_router = safe_import_router("app.routes.files", "Files")
 events_router = safe_import_router("app.routes.events", "Events")  # NEW
+logging.info(f"Startup: imports done in {(time.perf_counter() - _boot_started) * 1000:.0f} ms")
 
 # Lifespan handler — replaces deprecated @app.on_event("startup")
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    phase_started = time.perf_counter()
+    schema = "unknown"
     try:
-        SQLModel.metadata.create_all(engine)
-        logging.info("Database tables ensured")
+        from app.db.schema import check_schema
+        schema = check_schema(engine)
     except Exception as e:
-        logging.error(f"Error creating database tables: {e}")
-    yield  # No shutdown logic needed yet
+        logging.error(f"Error checking database schema: {e}")
+    if schema == "current":
+        logging.info("Database schema is at the migration head")
+    elif os.getenv("SCHEMA_CHECK", "warn").lower() == "strict":
+        raise RuntimeError(f"Database schema is {schema}; run `alembic upgrade head` before starting")
+    elif schema == "unversioned":
+        # Databases Alembic has never touched (fresh development setups) still get their tables, as before
+        logging.warning("Database schema is unversioned; run `alembic upgrade head`. Creating missing tables")
+        try:
+            SQLModel.metadata.create_all(engine)
+        except Exception as e:
+            logging.error(f"Error creating database tables: {e}")
+    else:
+        # A migrated schema is only changed by Alembic: create_all would add tables outside its history
+        logging.warning(f"Database schema is {schema}; run `alembic upgrade head`. Not creating tables")
+    logging.info(f"Startup: schema check {(time.perf_counter() - phase_started) * 1000:.0f} ms")
+
+    phase_started = time.perf_counter()
+    try:
+        from app.services.user_cache import invalidation_listener
+        invalidation_listener.start()
+    except Exception as e:
+        logging.error(f"Error starting user cache listener: {e}")
+    logging.info(f"Startup: background services {(time.perf_counter() - phase_started) * 1000:.0f} ms")
+    logging.info(f"Startup: ready {(time.perf_counter() - _boot_started) * 1000:.0f} ms after first import")
+    yield
+    try:
+        from app.services.admission import admission
+        admission.shutdown()
+        logging.info("Admission write-behind flushed")
+    except Exception as e:
+        logging.error(f"Error flushing admission index: {e}")
+    try:
+        from app.services.user_cache import invalidation_listener
+        invalidation_listener.stop()
+    except Exception as e:
+        logging.error(f"Error stopping user cache listener: {e}")
 
 # Instantiate the FastAPI app with lifespan
 try:
@@ -92,6 +133,13 @@ try:
 except Exception as e:
     logging.error(f"Error configuring CORS: {e}")
 
+# Read-your-writes pinning for replica-served endpoints
+try:
+    from app.db.replica import ReadYourWritesMiddleware
+    app.add_middleware(ReadYourWritesMiddleware)
+except Exception as e:
+    logging.error(f"Error configuring read-your-writes middleware: {e}")
+
 # Mount routers with consistent /api prefix
 try:
     if tickets_router:
@@ -0,0 +1,12 @@
+from sqlmodel import SQLModel, Field
+
+
+class TicketCounter(SQLModel, table=True):
+    """
+    Last ticket number handed out for a numbering scope.
+    Incremented atomically with UPDATE ... RETURNING instead of scanning ticket.
+    """
+    __tablename__ = "ticket_counter"
+
+    scope: str = Field(primary_key=True)
+    value: int = Field(default=0, nullable=False)
@@ -1,5 +1,7 @@
-from typing import Optional
+from typing import List, Optional
 from uuid import uuid4
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Index, func, literal_column
 from sqlmodel import SQLModel, Field
 from pydantic import ConfigDict
 
@@ -12,6 +14,7 @@ class TicketBase(SQLModel):
     date_of_birth: Optional[str] = Field(default=None, nullable=True)
     phone_number: Optional[str] = Field(default=None, nullable=True)
     event: Optional[str] = Field(default=None, nullable=True)
+    event_id: Optional[str] = Field(default=None, foreign_key="event.id", nullable=True, ondelete="SET NULL")
 
 # ---------------------------
 # Ticket Creation Payload
@@ -24,12 +27,38 @@ class TicketCreate(TicketBase):
 # Ticket DB Model
 # ---------------------------
 class Ticket(TicketBase, table=True):
+    # On Postgres the table is LIST-partitioned by event_id (migration b5e8d2c41f93, app/db/partitions.py);
+    # ticket_id and ticket_number are then unique per partition, which holds since both are generated
+    __table_args__ = (
+        # Attendance windows per event: WHERE event = ? AND scanned_at BETWEEN ? AND ?
+        Index("ix_ticket_event_scanned_at", "event", "scanned_at"),
+        # Export filters and live counters
+        Index("ix_ticket_event_used", "event", "used"),
+        Index("ix_ticket_event_scanned_by", "event", "scanned_by"),
+        Index("ix_ticket_scanned_by", "scanned_by"),
+        # One ticket per ID card per event
+        Index("uq_ticket_id_card_number_event", "id_card_number", "event", unique=True),
+        # The same, keyed on the event foreign key; the free-text indexes above go once clients send event_id
+        Index("ix_ticket_event_id_scanned_at", "event_id", "scanned_at"),
+        Index("ix_ticket_event_id_used", "event_id", "used"),
+        Index("ix_ticket_event_id_scanned_by", "event_id", "scanned_by"),
+        Index("uq_ticket_id_card_number_event_id", "id_card_number", "event_id", unique=True),
+    )
+
     ticket_id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True, index=True)
     ticket_number: Optional[str] = Field(default=None, index=True, unique=True)
     used: bool = Field(default=False)
-    scanned_at: Optional[str] = Field(default=None, nullable=True)
+    scanned_at: Optional[datetime] = Field(default=None, sa_column=Column(DateTime(timezone=True), nullable=True))
     scanned_by: Optional[str] = Field(default=None, foreign_key="user.id", nullable=True)  # NEW
 
+# Keyset pages ordered by event: the exact sort key of app/services/pagination.py
+Index(
+    "ix_ticket_page_event",
+    func.coalesce(Ticket.__table__.c.event, literal_column("''")),
+    func.coalesce(Ticket.__table__.c.ticket_number, literal_column("''")),
+    Ticket.__table__.c.ticket_id,
+)
+
 # ---------------------------
 # Ticket Response Payload
 # ---------------------------
@@ -43,12 +72,43 @@ class TicketResponse(SQLModel):
     qr: str
     status: str
     event: Optional[str] = None
-    timestamp: Optional[str] = None
+    event_id: Optional[str] = None
+    timestamp: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True)
 
+# ---------------------------
+# Lean Scan Response Payload
+# ---------------------------
+class ScanResponse(SQLModel):
+    status: str
+    ticket_number: Optional[str] = None
+    name: Optional[str] = None
+    event: Optional[str] = None
+    timestamp: Optional[datetime] = None
+
 # ---------------------------
 # Ticket Validation Payload
 # ---------------------------
 class TicketValidationRequest(SQLModel):
     payload: str
+
+# ---------------------------
+# Offline Batch Scan Payloads
+# ---------------------------
+class ScanRecord(SQLModel):
+    ticket_id: str
+    scanned_at: datetime
+    device_id: Optional[str] = None
+
+class ScanBatchRequest(SQLModel):
+    scans: List[ScanRecord]
+
+class ScanOutcome(SQLModel):
+    ticket_id: str
+    device_id: Optional[str] = None
+    scanned_at: str
+    status: str  # "valid" | "already_checked_in" | "not_found"
+
+class ScanBatchResponse(SQLModel):
+    results: List[ScanOutcome]
@@ -1,19 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Body
+from fastapi import APIRouter, Depends, HTTPException, Query, Body, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Optional, Literal
 from datetime import datetime
 import logging
-import io
-import base64
-import qrcode
 from uuid import uuid4
 
-from app.db.session import get_session
+from app.db.session import get_session, get_read_session, get_async_session
+from app.db.engine import db_pool_stats
+from app.db.partitions import truncate_partition
+from app.db.replica import read_router
 from app.models.user import User
 from app.models.ticket import Ticket, TicketResponse
 from app.schemas.user import UserResponse  # ✅ make sure this exists
-from app.utils.auth import verify_password, create_token, hash_password
+from app.services.export import EXPORT_MEDIA_TYPES, export_query, export_row, stream_export
+from app.services.columnar import COLUMNAR_MEDIA_TYPES, ColumnarUnavailable, require_pyarrow, stream_columnar
+from app.services.admission import admission
+from app.services.pagination import (
+    paginate, InvalidCursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, PageOrder, PAGE_ORDER_DESCRIPTION,
+)
+from app.services.events import event_clause, lookup_event_id, resolve_event, UnknownEvent
+from app.services.user_cache import user_cache
+from app.utils.auth import verify_and_update_async, create_token, hash_password
+from app.services.password_pool import password_pool, PoolBusy
 from app.dependencies.auth import require_permission, get_current_user
 
 router = APIRouter(prefix="/admin")
@@ -29,27 +42,32 @@ class CreateUserRequest(BaseModel):
     password: str
     role: str
 
-# 🎟️ QR Generator
-def generate_qr_base64(data: str) -> str:
-    qr_img = qrcode.make(data)
-    buf = io.BytesIO()
-    qr_img.save(buf, format="PNG")
-    return base64.b64encode(buf.getvalue()).decode("utf-8")
-
 # 🔐 Admin Login
 @router.post("/login")
-def login(
+async def login(
     data: LoginRequest,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    user = session.exec(select(User).where(User.email == data.email)).first()
+    user = (await session.exec(select(User).where(User.email == data.email))).first()
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    if not user or not verify_password(data.password, user.hashed_password):
+    # bcrypt runs on the dedicated password pool; when it is saturated, shed load instead of queueing
+    try:
+        valid, new_hash = await verify_and_update_async(data.password, user.hashed_password)
+    except PoolBusy:
+        raise HTTPException(status_code=429, detail="Too many logins in progress, retry shortly", headers={"Retry-After": "1"})
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     if not user.is_active:
         raise HTTPException(status_code=403, detail="User is inactive")
 
+    if new_hash:
+        user.hashed_password = new_hash
+        session.add(user)
+        await session.commit()
+
     token = create_token(user)
     return {"access_token": token, "token_type": "bearer"}
 
@@ -64,10 +82,15 @@ def create_user(
     if existing:
         raise HTTPException(status_code=409, detail="User already exists")
 
+    try:
+        hashed = hash_password(data.password)
+    except PoolBusy:
+        raise HTTPException(status_code=429, detail="Password hashing is busy, retry shortly", headers={"Retry-After": "1"})
+
     new_user = User(
         id=str(uuid4()),
         email=data.email,
-        hashed_password=hash_password(data.password),
+        hashed_password=hashed,
         role=data.role,
         token_version=1,
         created_at=datetime.utcnow(),
@@ -98,14 +121,26 @@ def edit_ticket(
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
 
+    # The event link is re-resolved like on create, never copied as given; a new event_id moves the row's partition
+    if "event" in updates or "event_id" in updates:
+        try:
+            ticket.event_id, ticket.event = resolve_event(session, updates.get("event"), updates.get("event_id"))
+        except UnknownEvent as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
     for key, value in updates.items():
-        if hasattr(ticket, key):
+        if key not in ("event", "event_id") and hasattr(ticket, key):
             setattr(ticket, key, value)
 
     session.add(ticket)
-    session.commit()
+    try:
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(status_code=400, detail="Ticket already exists for this ID and event")
     session.refresh(ticket)
-    return TicketResponse.model_validate(ticket)
+    # TicketResponse needs qr and status, which are not ticket columns
+    return export_row(ticket)
 
 # 🗑️ Delete Single Ticket
 @router.delete("/tickets/{ticket_id}")
@@ -125,59 +160,148 @@ def delete_ticket(
 @router.delete("/tickets")
 def bulk_delete(
     confirm: bool = False,
+    event: Optional[str] = Query(None, description="Only this event's tickets (event id or name)"),
     session: Session = Depends(get_session),
     _admin: User = Depends(require_permission("delete_ticket")),
 ):
     if not confirm:
         raise HTTPException(status_code=400, detail="Confirmation required")
-    tickets = session.exec(select(Ticket)).all()
-    for t in tickets:
-        session.delete(t)
+    if not event:
+        session.execute(delete(Ticket))
+        session.commit()
+        return {"message": "All tickets deleted successfully"}
+
+    event_id = lookup_event_id(session, event)
+    # A partitioned ticket table empties an event's partition in one step instead of row by row
+    if not (event_id and truncate_partition(session.connection(), event_id)):
+        session.execute(delete(Ticket).where(event_clause(event, event_id)))
     session.commit()
-    return {"message": "All tickets deleted successfully"}
+    return {"message": f"Tickets of event {event} deleted successfully"}
 
 # 📤 Export Tickets
 @router.get("/export", response_model=List[TicketResponse])
 def export_tickets(
+    response: Response,
     used: Optional[bool] = Query(None),
-    event: Optional[str] = Query(None),
+    event: Optional[str] = Query(None, description="Event id or name"),
     scanned_by: Optional[str] = Query(None),
-    start: Optional[str] = Query(None),
-    end: Optional[str] = Query(None),
-    session: Session = Depends(get_session),
-    _viewer: User = Depends(require_permission("export")),
+    start: Optional[datetime] = Query(None, description="Scanned at or after (ISO 8601; no offset means UTC)"),
+    end: Optional[datetime] = Query(None, description="Scanned at or before (ISO 8601; no offset means UTC)"),
+    qr: Optional[Literal["inline", "url", "none"]] = Query(
+        None, description="How to deliver each ticket's QR code; inline by default, none for parquet and arrow",
+    ),
+    fmt: Literal["json", "ndjson", "csv", "parquet", "arrow"] = Query(
+        "json", alias="format",
+        description="ndjson, csv, parquet and arrow (IPC stream) stream rows from a server-side cursor as they are read; "
+                    "parquet and arrow need pyarrow",
+    ),
+    order: PageOrder = Query("ticket_id", description=PAGE_ORDER_DESCRIPTION),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; json only, all rows when omitted"),
+    cursor: Optional[str] = Query(None, description=f"{NEXT_CURSOR_HEADER} of the previous page"),
+    # Closed when this function returns, before a streamed body opens its own connection
+    session: Session = Depends(get_read_session, scope="function"),
+    _viewer: User = Depends(require_permission("export", scope="function")),
+):
+    """
+    Tickets matching the filters. With limit or cursor, one page in keyset order and
+    the next page's cursor in the X-Next-Cursor header, absent on the last page.
+    """
+    # Inline QR codes are a few KB of base64 per row, too heavy to buffer into columnar row groups unasked
+    qr = qr or ("none" if fmt in COLUMNAR_MEDIA_TYPES else "inline")
+    query = export_query(session, used, event, scanned_by, start, end)
+
+    if limit or cursor:
+        if fmt != "json":
+            raise HTTPException(status_code=400, detail="Pagination applies to format=json; other formats stream every row")
+        try:
+            tickets, next_cursor = paginate(session, query, order, limit or DEFAULT_PAGE_SIZE, cursor)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return [export_row(t, qr) for t in tickets]
+
+    if fmt == "json":
+        return [export_row(t, qr) for t in session.exec(query).all()]
+
+    if fmt in COLUMNAR_MEDIA_TYPES:
+        try:
+            require_pyarrow()
+        except ColumnarUnavailable as e:
+            raise HTTPException(status_code=501, detail=str(e))
+        body, media_type = stream_columnar(session.get_bind(), query, fmt, qr), COLUMNAR_MEDIA_TYPES[fmt]
+    else:
+        body, media_type = stream_export(session.get_bind(), query, fmt, qr), EXPORT_MEDIA_TYPES[fmt]
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="tickets.{fmt}"',
+            # Returned responses do not pick up headers set by dependencies
+            "X-DB-Route": response.headers.get("X-DB-Route", ""),
+        },
+    )
+
+# 🚪 Hot-Event Admission Index
+@router.get("/admission")
+def admission_stats(
+    _admin: User = Depends(require_permission("manage_admission")),
+):
+    return admission.stats()
+
+@router.post("/admission/{event}")
+def activate_admission(
+    event: str,
+    _admin: User = Depends(require_permission("manage_admission")),
+):
+    """
+    Load an event's tickets into the in-memory admission index.
+    Scans for the event are then answered from memory and persisted write-behind.
+    """
+    index = admission.activate(event)
+    return {"message": f"Admission index active for {event}", "tickets": len(index), "used": index.used_count()}
+
+@router.delete("/admission/{event}")
+def deactivate_admission(
+    event: str,
+    _admin: User = Depends(require_permission("manage_admission")),
+):
+    if not admission.deactivate(event):
+        raise HTTPException(status_code=404, detail="Event is not active")
+    return {"message": f"Admission index removed for {event}"}
+
+@router.get("/admission/{event}/consistency")
+def admission_consistency(
+    event: str,
+    _admin: User = Depends(require_permission("manage_admission")),
+):
+    try:
+        return admission.check_consistency(event)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Event is not active")
+
+# 📈 Metrics
+@router.get("/metrics/auth")
+def auth_cache_metrics(
+    _admin: User = Depends(require_permission("view_metrics")),
+):
+    """Hit rate and size of the authenticated-user cache in this worker."""
+    return user_cache.stats()
+
+@router.get("/metrics/db")
+def db_metrics(
+    _admin: User = Depends(require_permission("view_metrics")),
+):
+    """Connection pool occupancy, overflow, acquire wait and timeouts per engine in this worker."""
+    return {**db_pool_stats(), "read_routing": read_router.stats()}
+
+@router.get("/metrics/passwords")
+def password_pool_metrics(
+    _admin: User = Depends(require_permission("view_metrics")),
 ):
-    query = select(Ticket)
-
-    if used is not None:
-        query = query.where(Ticket.used == used)
-    if event:
-        query = query.where(Ticket.event == event)
-    if scanned_by:
-        query = query.where(Ticket.scanned_by == scanned_by)
-    if start:
-        query = query.where(Ticket.scanned_at >= start)
-    if end:
-        query = query.where(Ticket.scanned_at <= end)
-
-    tickets = session.exec(query).all()
-    results: List[TicketResponse] = []
-    for t in tickets:
-        results.append(
-            TicketResponse(
-                ticket_number=t.ticket_number,
-                name=t.name,
-                id_card_number=t.id_card_number,
-                date_of_birth=t.date_of_birth,
-                phone_number=t.phone_number,
-                ticket_id=t.ticket_id,
-                qr=generate_qr_base64(t.ticket_id),
-                status="already_checked_in" if t.used else "valid",
-                event=t.event,
-                timestamp=t.scanned_at
-            )
-        )
-    return results
+    """bcrypt pool depth, rejections and hash/verify latency in this worker."""
+    return password_pool.stats()
 
 # 🗑️ Delete User
 @router.delete("/delete_user")
@@ -1,22 +1,31 @@
 from fastapi import APIRouter, Depends, HTTPException, Form
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import datetime
 import os
 
 from app.models.user import User
-from app.utils.auth import verify_password, create_token
-from app.db.session import get_session
+from app.utils.auth import verify_and_update_async, create_token
+from app.services.password_pool import PoolBusy
+from app.db.session import get_async_session
 
 router = APIRouter()
 
 @router.post("/login")
-def login(
+async def login(
     email: str = Form(...),
     password: str = Form(...),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
-    user = session.exec(select(User).where(User.email == email)).first()
-    if not user or not verify_password(password, user.hashed_password):
+    user = (await session.exec(select(User).where(User.email == email))).first()
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    try:
+        valid, new_hash = await verify_and_update_async(password, user.hashed_password)
+    except PoolBusy:
+        raise HTTPException(status_code=429, detail="Too many logins in progress, retry shortly", headers={"Retry-After": "1"})
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     if not user.is_active:
@@ -25,7 +34,9 @@ def login(
     token = create_token(user)
 
     user.last_login = datetime.utcnow()
+    if new_hash:
+        user.hashed_password = new_hash
     session.add(user)
-    session.commit()
+    await session.commit()
 
     return {"access_token": token, "token_type": "bearer"}
@@ -1,17 +1,29 @@
 # app/routes/events.py
+import asyncio
 import logging
-from fastapi import APIRouter, Depends, HTTPException
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
+from typing import Optional
 from uuid import uuid4
 from datetime import datetime
 
-from app.db.session import get_session
+from app.db.partitions import create_partition, detach_partition, PartitionBusy
+from app.db.session import get_session, get_read_session
 from app.models.event import Event, EventCreate, EventRead
 from app.models.user import User
 from app.dependencies.auth import require_permission
+from app.services.events import link_tickets
+from app.services.manifest import build_manifest
+from app.services.live import live
 
 log = logging.getLogger("uvicorn.error")
 
+LIVE_KEEPALIVE_SECONDS = 15
+
 router = APIRouter(prefix="/events")
 
 @router.post("/", response_model=EventRead)
@@ -38,9 +50,22 @@ def create_event(
             created_at=datetime.utcnow()
         )
         session.add(new_event)
+        session.flush()
+        # Created with the event, so every ticket linked to it lands in its own partition
+        create_partition(session.connection(), new_event.id)
         session.commit()
         session.refresh(new_event)
         log.info(f"Event created: {new_event.id} ({new_event.name})")
+
+        # Tickets registered under this name before the event existed
+        try:
+            linked = link_tickets(session, new_event)
+            session.commit()
+            if linked:
+                log.info(f"Linked {linked} existing tickets to event {new_event.id}")
+        except IntegrityError as e:
+            session.rollback()
+            log.warning(f"Tickets for event {new_event.id} left unlinked, duplicate ID cards: {e.orig}")
         return new_event
     except HTTPException:
         raise
@@ -50,7 +75,7 @@ def create_event(
 
 @router.get("/", response_model=list[EventRead])
 def list_events(
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
     _viewer: User = Depends(require_permission("view_events")),
 ):
     """
@@ -63,6 +88,85 @@ def list_events(
         log.error(f"Error listing events: {e}")
         raise HTTPException(status_code=500, detail="Error retrieving events")
 
+@router.get("/{event_id}/manifest")
+def get_event_manifest(
+    event_id: str,
+    since_version: Optional[int] = Query(None, description="Manifest version the device already holds"),
+    session: Session = Depends(get_session),
+    _scanner: User = Depends(require_permission("scan_ticket")),
+):
+    """
+    Compact binary snapshot of an event's ticket ids and used state for offline scanners.
+    With since_version, returns a delta when that version is still known, 304 when unchanged.
+    """
+    try:
+        event = session.get(Event, event_id)
+        if not event:
+            raise HTTPException(status_code=404, detail="Event not found")
+
+        version, body = build_manifest(session, event.id, since_version)
+        headers = {"X-Manifest-Version": str(version), "ETag": f'"{version}"'}
+        if body is None:
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/octet-stream", headers=headers)
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.error(f"Error building manifest for event {event_id}: {e}")
+        raise HTTPException(status_code=500, detail="Error building manifest")
+
+@router.get("/{event_id}/live")
+async def event_live(
+    event_id: str,
+    request: Request,
+    interval: Optional[float] = Query(None, ge=0.2, le=60, description="Seconds between coalesced updates"),
+    # Closed when this function returns, not after the stream: a subscriber must not hold a pooled connection
+    session: Session = Depends(get_session, scope="function"),
+    _viewer: User = Depends(require_permission("export", scope="function")),
+):
+    """
+    Server-sent events stream of check-in counts, per-scanner counts and recent scans.
+    Scans are coalesced: at most one update is sent per interval, and only when something changed.
+    """
+    event = await run_in_threadpool(session.get, Event, event_id)
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    channel = live.subscribe(event.id)
+    period = interval or live.interval
+
+    async def stream():
+        last_version = None
+        last_sent = time.monotonic()
+        try:
+            while not await request.is_disconnected():
+                if channel.claim_reload(live.resync_interval):
+                    try:
+                        await run_in_threadpool(channel.reload)
+                    except Exception as e:
+                        log.error(f"Error loading live counters for event {event_id}: {e}")
+                    finally:
+                        channel.reload_done()
+
+                version, payload = channel.snapshot()
+                if version != last_version:
+                    yield f"event: checkins\ndata: {payload}\n\n"
+                    last_version = version
+                    last_sent = time.monotonic()
+                elif time.monotonic() - last_sent > LIVE_KEEPALIVE_SECONDS:
+                    yield ": keepalive\n\n"
+                    last_sent = time.monotonic()
+
+                await asyncio.sleep(period)
+        finally:
+            live.unsubscribe(channel)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.delete("/{event_id}")
 def delete_event(
     event_id: str,
@@ -76,9 +180,15 @@ def delete_event(
         event = session.get(Event, event_id)
         if not event:
             raise HTTPException(status_code=404, detail="Event not found")
+        # Detaching first keeps ON DELETE SET NULL from moving every ticket into the default partition.
+        # The detach locks ticket until the commit, so nothing slow runs between the two.
+        try:
+            archived = detach_partition(session.connection(), event.id)
+        except PartitionBusy as e:
+            raise HTTPException(status_code=503, detail=str(e))
         session.delete(event)
         session.commit()
-        log.info(f"Event deleted: {event_id}")
+        log.info(f"Event deleted: {event_id}" + (f", tickets archived in {archived}" if archived else ""))
         return {"message": f"Event {event_id} deleted successfully"}
     except HTTPException:
         raise
@@ -2,7 +2,7 @@ from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session, select
 
-from app.db.session import get_session
+from app.db.session import get_session, get_read_session
 from app.models.template import TicketTemplate
 from app.schemas.template import TemplateCreate, TemplateUpdate, TemplateOut
 from app.dependencies.auth import require_admin
@@ -12,7 +12,7 @@ router = APIRouter(prefix="/templates", tags=["Templates"])
 
 @router.get("/", response_model=list[TemplateOut])
 def list_templates(
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
     _ = Depends(require_admin)
 ):
     """List all ticket templates (admin only)."""
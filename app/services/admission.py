@@ -0,0 +1,297 @@
+import os
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import update, bindparam
+from sqlmodel import Session, select
+
+from app.db.engine import engine
+from app.models.ticket import Ticket
+from app.services.events import event_clause, lookup_event_id
+
+log = logging.getLogger("uvicorn.error")
+
+# (ticket_number, name, id_card_number, date_of_birth, phone_number, event)
+TicketInfo = Tuple[Optional[str], Optional[str], Optional[str], Optional[str], Optional[str], Optional[str]]
+PendingScan = Tuple[str, datetime, Optional[str]]  # (ticket_id, scanned_at, scanned_by)
+
+
+class EventIndex:
+    """
+    Compact in-memory admission state for one event:
+    ticket_id -> slot, one bit per slot for `used`, and the fields a scan response needs.
+    Linked events are indexed by event_id; `event` is the text the index was activated with.
+    """
+
+    def __init__(self, event_id: Optional[str], event: str, rows: List[tuple]):
+        self.event_id = event_id
+        self.event = event
+        self.slots: Dict[str, int] = {}
+        self.info: List[TicketInfo] = []
+        self.scanned_at: List[Optional[datetime]] = []
+        self.used = bytearray((len(rows) + 7) // 8)
+        # Linked tickets may name their event by id or by name; keep one copy of each text
+        texts: Dict[Optional[str], Optional[str]] = {}
+
+        for slot, (ticket_id, ticket_number, name, id_card, dob, phone, used, scanned_at, text) in enumerate(rows):
+            self.slots[ticket_id] = slot
+            self.info.append((ticket_number, name, id_card, dob, phone, texts.setdefault(text, text)))
+            self.scanned_at.append(scanned_at)
+            if used:
+                self.used[slot >> 3] |= 1 << (slot & 7)
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def is_used(self, slot: int) -> bool:
+        return bool(self.used[slot >> 3] & (1 << (slot & 7)))
+
+    def mark_used(self, slot: int, scanned_at: datetime) -> None:
+        self.used[slot >> 3] |= 1 << (slot & 7)
+        self.scanned_at[slot] = scanned_at
+
+    @property
+    def key(self) -> str:
+        return self.event_id or self.event
+
+    def clause(self):
+        return event_clause(self.event, self.event_id)
+
+    def used_count(self) -> int:
+        return sum(bin(b).count("1") for b in self.used)
+
+    def ticket(self, ticket_id: str, slot: int) -> Ticket:
+        ticket_number, name, id_card, dob, phone, event = self.info[slot]
+        return Ticket(
+            ticket_id=ticket_id,
+            ticket_number=ticket_number,
+            name=name,
+            id_card_number=id_card,
+            date_of_birth=dob,
+            phone_number=phone,
+            event=event,
+            event_id=self.event_id,
+            used=self.is_used(slot),
+            scanned_at=self.scanned_at[slot],
+        )
+
+
+class AdmissionEngine:
+    """
+    Opt-in in-process admission for events that are activated at doors-open.
+
+    Scans of tickets in an active event are answered from memory and written
+    to the database behind the response, in batched commits every
+    `flush_interval` seconds or once `flush_size` scans are pending.
+    Tickets outside every active index (unknown ids, tickets created after
+    activation, inactive events) fall through to the normal database path.
+
+    The index lives in one process: route all scans for an active event to a
+    single worker. Scans buffered since the last flush are lost if the process dies.
+    """
+
+    def __init__(self, flush_interval: float = 0.5, flush_size: int = 500):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self._indexes: Dict[str, EventIndex] = {}
+        self._pending: List[PendingScan] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self.memory_scans = 0
+        self.flushed = 0
+        self.conflicts = 0
+
+    # --- lifecycle ---
+    def activate(self, event: str) -> EventIndex:
+        """Index the tickets of an event given by id or name; unlinked free text is matched as before."""
+        with Session(engine) as session:
+            event_id = lookup_event_id(session, event)
+            rows = session.exec(
+                select(
+                    Ticket.ticket_id, Ticket.ticket_number, Ticket.name, Ticket.id_card_number,
+                    Ticket.date_of_birth, Ticket.phone_number, Ticket.used, Ticket.scanned_at, Ticket.event,
+                ).where(event_clause(event, event_id))
+            ).all()
+        index = EventIndex(event_id, event, rows)
+
+        with self._lock:
+            self._indexes[index.key] = index
+        self._ensure_worker()
+        log.info("Admission index activated for event %r (%d tickets)", index.key, len(index))
+        return index
+
+    def _key(self, event: str) -> str:
+        """Index key of an event given by id or name, as activate() stored it."""
+        if event in self._indexes:
+            return event
+        with Session(engine) as session:
+            return lookup_event_id(session, event) or event
+
+    def deactivate(self, event: str) -> bool:
+        self.flush()
+        key = self._key(event)
+        with self._lock:
+            removed = self._indexes.pop(key, None) is not None
+        if removed:
+            log.info("Admission index deactivated for event %r", key)
+        return removed
+
+    def shutdown(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        if self._worker:
+            self._worker.join(timeout=5)
+            self._worker = None
+        self.flush()
+
+    def _ensure_worker(self) -> None:
+        if self._worker and self._worker.is_alive():
+            return
+        self._stopped.clear()
+        self._worker = threading.Thread(target=self._run, name="admission-flush", daemon=True)
+        self._worker.start()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                log.error("Admission write-behind flush failed: %s", e)
+
+    # --- hot path ---
+    def _locate(self, ticket_id: str) -> Optional[Tuple[EventIndex, int]]:
+        for index in self._indexes.values():
+            slot = index.slots.get(ticket_id)
+            if slot is not None:
+                return index, slot
+        return None
+
+    def scan(self, ticket_id: str, scanner_id: Optional[str], event_id: Optional[str] = None) -> Optional[Tuple[str, Ticket]]:
+        """
+        Admit a ticket from memory. Returns (status, ticket), or None when the
+        ticket is not in any active index and the caller must use the database.
+        With a gate's event_id, tickets indexed for another event are also left
+        to the database path, whose event filter answers not_found.
+        """
+        if not self._indexes:
+            return None
+
+        with self._lock:
+            found = self._locate(ticket_id)
+            if found is None:
+                return None
+            index, slot = found
+            if event_id and index.event_id != event_id:
+                return None
+
+            if index.is_used(slot):
+                return "already_checked_in", index.ticket(ticket_id, slot)
+
+            scanned_at = datetime.now(timezone.utc)
+            index.mark_used(slot, scanned_at)
+            self._pending.append((ticket_id, scanned_at, scanner_id))
+            self.memory_scans += 1
+            pending = len(self._pending)
+
+        if pending >= self.flush_size:
+            self._wakeup.set()
+        return "valid", index.ticket(ticket_id, slot)
+
+    def mark_used(self, ticket_id: str, scanned_at: datetime) -> None:
+        """Reflect a scan that was written to the database by another path."""
+        with self._lock:
+            found = self._locate(ticket_id)
+            if found is not None:
+                index, slot = found
+                index.mark_used(slot, scanned_at)
+
+    # --- write-behind ---
+    def flush(self) -> int:
+        """Persist pending scans with one executemany conditional UPDATE and one commit."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+
+            table = Ticket.__table__
+            stmt = (
+                update(table)
+                .where(table.c.ticket_id == bindparam("b_ticket_id"), table.c.used == False)  # noqa: E712
+                .values(used=True, scanned_at=bindparam("b_scanned_at"), scanned_by=bindparam("b_scanned_by"))
+            )
+            params = [
+                {"b_ticket_id": ticket_id, "b_scanned_at": scanned_at, "b_scanned_by": scanned_by}
+                for ticket_id, scanned_at, scanned_by in batch
+            ]
+            try:
+                with Session(engine) as session:
+                    result = session.execute(stmt, params)
+                    session.commit()
+            except Exception:
+                with self._lock:
+                    self._pending[:0] = batch
+                raise
+
+            written = result.rowcount if result.rowcount is not None and result.rowcount >= 0 else len(batch)
+            self.flushed += written
+            if written < len(batch):
+                # Already admitted through another worker or the DB path
+                self.conflicts += len(batch) - written
+                log.warning("Admission flush: %d of %d scans were already recorded", len(batch) - written, len(batch))
+            return written
+
+    # --- introspection ---
+    def check_consistency(self, event: str) -> dict:
+        """
+        Compare an active index against the ticket table.
+        Scans still waiting for write-behind are not counted as mismatches.
+        """
+        self.flush()
+        key = self._key(event)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is None:
+                raise KeyError(event)
+            memory = {tid: index.is_used(slot) for tid, slot in index.slots.items()}
+
+        with Session(engine) as session:
+            rows = session.exec(select(Ticket.ticket_id, Ticket.used).where(index.clause())).all()
+        database = {tid: used for tid, used in rows}
+
+        missing_in_db = [tid for tid in memory if tid not in database]
+        not_indexed = [tid for tid in database if tid not in memory]
+        used_mismatch = [tid for tid, used in memory.items() if tid in database and database[tid] != used]
+        return {
+            "event": event,
+            "event_id": index.event_id,
+            "indexed": len(memory),
+            "in_database": len(database),
+            "consistent": not (missing_in_db or not_indexed or used_mismatch),
+            "missing_in_database": missing_in_db[:100],
+            "not_indexed": not_indexed[:100],
+            "used_mismatch": used_mismatch[:100],
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "events": {event: {"tickets": len(index), "used": index.used_count()} for event, index in self._indexes.items()},
+                "pending": len(self._pending),
+                "memory_scans": self.memory_scans,
+                "flushed": self.flushed,
+                "conflicts": self.conflicts,
+            }
+
+
+admission = AdmissionEngine(
+    flush_interval=float(os.getenv("ADMISSION_FLUSH_INTERVAL", "0.5")),
+    flush_size=int(os.getenv("ADMISSION_FLUSH_SIZE", "500")),
+)
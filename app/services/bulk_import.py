@@ -0,0 +1,151 @@
+import csv
+import io
+import json
+import uuid
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, tuple_
+from sqlmodel import Session, select
+
+from app.models.ticket import Ticket, TicketCreate
+from app.services.events import TicketEvent, UnknownEvent, resolve_event
+from app.services.numbering import allocate_ticket_numbers, format_ticket_number
+
+BATCH_SIZE = 1000
+
+ParsedRow = Tuple[int, Optional[TicketCreate], Optional[str]]
+
+
+def parse_rows(data: bytes, content_type: Optional[str]) -> Iterator[ParsedRow]:
+    """
+    Yield (row number, ticket, error) for each record of a CSV or JSON lines body.
+    Rows are numbered from 1, excluding the CSV header.
+    """
+    text = data.decode("utf-8-sig")
+    if content_type and "csv" in content_type:
+        records: Iterable = csv.DictReader(io.StringIO(text))
+    else:
+        records = (line for line in text.splitlines() if line.strip())
+
+    for number, record in enumerate(records, start=1):
+        try:
+            if isinstance(record, str):
+                record = json.loads(record)
+            else:
+                record = {k: (v or None) for k, v in record.items() if k}
+            yield number, TicketCreate.model_validate(record), None
+        except (ValueError, ValidationError) as e:
+            yield number, None, str(e).splitlines()[0]
+
+
+def _existing_keys(session: Session, keys: List[Tuple[str, str]], column) -> set:
+    if not keys:
+        return set()
+    rows = session.exec(
+        select(Ticket.id_card_number, column)
+        .where(tuple_(Ticket.id_card_number, column).in_(keys))
+    ).all()
+    return {(r[0], r[1]) for r in rows}
+
+
+def _resolve(session: Session, ticket: TicketCreate, events: dict) -> TicketEvent:
+    """resolve_event, memoised per upload: a file usually names a handful of events many times over."""
+    key = (ticket.event, ticket.event_id)
+    if key not in events:
+        try:
+            events[key] = resolve_event(session, ticket.event, ticket.event_id)
+        except UnknownEvent as e:
+            events[key] = e
+    if isinstance(events[key], UnknownEvent):
+        raise events[key]
+    return events[key]
+
+
+def _dedup_key(ticket: TicketCreate, event_id: Optional[str], event: Optional[str]) -> Tuple:
+    # Linked tickets are unique per event_id, unlinked ones per free-text event
+    return (ticket.id_card_number, "id", event_id) if event_id else (ticket.id_card_number, "text", event)
+
+
+def import_batch(session: Session, batch: List[ParsedRow], seen: set, events: Optional[dict] = None) -> List[dict]:
+    """
+    Insert one batch of parsed rows: one duplicate lookup per key kind, one counter bump,
+    one executemany INSERT and one commit.
+    """
+    events = {} if events is None else events
+    results: List[dict] = []
+    candidates: List[Tuple[int, TicketCreate, Optional[str], Optional[str]]] = []
+
+    for number, ticket, error in batch:
+        if error:
+            results.append({"row": number, "status": "error", "detail": error})
+            continue
+        try:
+            event_id, event = _resolve(session, ticket, events)
+        except UnknownEvent as e:
+            results.append({"row": number, "status": "error", "detail": str(e)})
+            continue
+        key = _dedup_key(ticket, event_id, event)
+        if None not in key:
+            if key in seen:
+                results.append({"row": number, "status": "duplicate", "detail": "Duplicate row in upload"})
+                continue
+            seen.add(key)
+        candidates.append((number, ticket, event_id, event))
+
+    with_card = [(t.id_card_number, event_id, event) for _, t, event_id, event in candidates if t.id_card_number is not None]
+    linked = _existing_keys(session, [(card, event_id) for card, event_id, _ in with_card if event_id], Ticket.event_id)
+    unlinked = _existing_keys(
+        session, [(card, event) for card, event_id, event in with_card if not event_id and event is not None], Ticket.event,
+    )
+    existing = {(card, "id", event_id) for card, event_id in linked} | {(card, "text", event) for card, event in unlinked}
+    fresh: List[Tuple[int, TicketCreate, Optional[str], Optional[str]]] = []
+    for number, t, event_id, event in candidates:
+        if _dedup_key(t, event_id, event) in existing:
+            results.append({"row": number, "status": "duplicate", "detail": "Ticket already exists for this ID and event"})
+        else:
+            fresh.append((number, t, event_id, event))
+
+    if fresh:
+        numbers = allocate_ticket_numbers(session, len(fresh))
+        values = []
+        for (number, t, event_id, event), ticket_number in zip(fresh, numbers):
+            values.append({
+                "ticket_id": str(uuid.uuid4()),
+                "ticket_number": format_ticket_number(ticket_number),
+                "name": t.name,
+                "id_card_number": t.id_card_number,
+                "date_of_birth": t.date_of_birth,
+                "phone_number": t.phone_number,
+                "event": event,
+                "event_id": event_id,
+                "used": False,
+                "scanned_at": None,
+            })
+        session.execute(insert(Ticket), values)
+        session.commit()
+
+        for (number, *_), row in zip(fresh, values):
+            results.append({
+                "row": number,
+                "status": "created",
+                "ticket_id": row["ticket_id"],
+                "ticket_number": row["ticket_number"],
+            })
+
+    results.sort(key=lambda r: r["row"])
+    return results
+
+
+def import_tickets(session: Session, rows: Iterable[ParsedRow]) -> Iterator[dict]:
+    """Import rows in batches of BATCH_SIZE, yielding per-row results as each batch commits."""
+    seen: set = set()
+    events: dict = {}
+    batch: List[ParsedRow] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            yield from import_batch(session, batch, seen, events)
+            batch = []
+    if batch:
+        yield from import_batch(session, batch, seen, events)
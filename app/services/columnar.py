@@ -0,0 +1,142 @@
+import io
+import logging
+import os
+from typing import Iterator, List
+
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from app.models.ticket import Ticket
+from app.services.export import STREAM_BATCH, export_qr
+from app.utils.dates import as_utc
+
+log = logging.getLogger("uvicorn.error")
+
+# Parquet row groups are buffered in memory until either limit is reached
+PARQUET_ROW_GROUP = int(os.getenv("EXPORT_PARQUET_ROW_GROUP", "65536"))
+PARQUET_ROW_GROUP_BYTES = int(os.getenv("EXPORT_PARQUET_ROW_GROUP_BYTES", str(32 * 1024 * 1024)))
+
+COLUMNAR_MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+TEXT_COLUMNS = ["ticket_id", "ticket_number", "name", "id_card_number", "date_of_birth", "phone_number"]
+# Few distinct values across many rows
+DICTIONARY_COLUMNS = ["event", "event_id", "scanned_by"]
+
+
+class ColumnarUnavailable(RuntimeError):
+    pass
+
+
+def require_pyarrow():
+    """pyarrow is optional and heavy to import, so it is loaded on the first columnar export."""
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise ColumnarUnavailable("format=parquet and format=arrow need pyarrow installed on the server")
+    return pyarrow
+
+
+def ticket_schema(pa, with_qr: bool):
+    """
+    Raw ticket columns rather than the JSON response shape: used stays a boolean,
+    which Parquet bit-packs at one bit per row, below any dictionary index.
+    """
+    fields = [pa.field(name, pa.string()) for name in TEXT_COLUMNS]
+    fields += [pa.field(name, pa.dictionary(pa.int32(), pa.string())) for name in DICTIONARY_COLUMNS]
+    fields += [pa.field("used", pa.bool_()), pa.field("scanned_at", pa.timestamp("us", tz="UTC"))]
+    if with_qr:
+        fields.append(pa.field("qr", pa.string()))
+    return pa.schema(fields)
+
+
+def record_batch(pa, schema, tickets: List[Ticket], qr: str):
+    arrays = []
+    for field in schema:
+        if field.name == "qr":
+            arrays.append(pa.array([export_qr(t, qr) for t in tickets], type=pa.string()))
+        elif field.name == "scanned_at":
+            arrays.append(pa.array([as_utc(t.scanned_at) for t in tickets], type=field.type))
+        elif pa.types.is_dictionary(field.type):
+            arrays.append(pa.array([getattr(t, field.name) for t in tickets], type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array([getattr(t, field.name) for t in tickets], type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class ChunkSink(io.RawIOBase):
+    """Write-only file that hands what has been written so far to the response, then forgets it."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_columnar(bind: Engine, query, fmt: str, qr: str = "none") -> Iterator[bytes]:
+    """
+    Parquet file or Arrow IPC stream of the export, one record batch per cursor fetch.
+    Arrow batches are sent as they are built; Parquet buffers a row group up to PARQUET_ROW_GROUP
+    rows or PARQUET_ROW_GROUP_BYTES of Arrow data, whichever comes first, and ends with the footer,
+    so the first bytes follow the first row group.
+    """
+    pa = require_pyarrow()
+    schema = ticket_schema(pa, qr != "none")
+    sink = ChunkSink()
+    if fmt == "parquet":
+        writer = pa.parquet.ParquetWriter(sink, schema, use_dictionary=DICTIONARY_COLUMNS)
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+
+    pending: list = []
+    pending_rows = 0
+    pending_bytes = 0
+
+    def flush_row_group():
+        nonlocal pending, pending_rows, pending_bytes
+        if pending:
+            writer.write_table(pa.Table.from_batches(pending, schema=schema))
+            pending, pending_rows, pending_bytes = [], 0, 0
+
+    try:
+        with Session(bind) as session:
+            result = session.exec(query.execution_options(yield_per=STREAM_BATCH))
+            for tickets in result.partitions():
+                batch = record_batch(pa, schema, tickets, qr)
+                if fmt == "parquet":
+                    pending.append(batch)
+                    pending_rows += batch.num_rows
+                    pending_bytes += batch.nbytes
+                    if pending_rows >= PARQUET_ROW_GROUP or pending_bytes >= PARQUET_ROW_GROUP_BYTES:
+                        flush_row_group()
+                else:
+                    writer.write_batch(batch)
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+        flush_row_group()
+        writer.close()
+        yield sink.drain()
+    except Exception as e:
+        log.error("Error streaming /admin/export as %s: %s", fmt, e)
+        raise
@@ -0,0 +1,91 @@
+from typing import List, Optional, Tuple
+
+from sqlalchemy import or_, update
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.event import Event
+from app.models.ticket import Ticket
+
+# (event_id, event) to store on a ticket
+TicketEvent = Tuple[Optional[str], Optional[str]]
+
+
+class UnknownEvent(ValueError):
+    pass
+
+
+def _candidates(key: str):
+    # Two rows are enough to tell a unique name from an ambiguous one
+    return select(Event.id).where(or_(Event.id == key, Event.name == key)).limit(2)
+
+
+def _pick(key: str, ids: List[str]) -> Optional[str]:
+    """An exact id match wins; a name only links when exactly one event carries it."""
+    if key in ids:
+        return key
+    return ids[0] if len(ids) == 1 else None
+
+
+def _check(event: Optional[str], event_id: str, found: Optional[Event]) -> TicketEvent:
+    if found is None:
+        raise UnknownEvent(f"Unknown event_id {event_id!r}")
+    if event and event not in (found.id, found.name):
+        raise UnknownEvent(f"event {event!r} does not match event_id {event_id!r}")
+    # The free-text column shows the event's name, as tickets registered by name do
+    return found.id, event or found.name
+
+
+def resolve_event(session: Session, event: Optional[str], event_id: Optional[str] = None) -> TicketEvent:
+    """
+    Accept a ticket's event as an event_id, an event id or name in the free-text field, or both.
+    Free text that matches no single event is kept unlinked, as before event_id existed.
+    """
+    if event_id:
+        return _check(event, event_id, session.get(Event, event_id))
+    if not event:
+        return None, event
+    return lookup_event_id(session, event), event
+
+
+async def resolve_event_async(session: AsyncSession, event: Optional[str], event_id: Optional[str] = None) -> TicketEvent:
+    """resolve_event for AsyncSession."""
+    if event_id:
+        return _check(event, event_id, await session.get(Event, event_id))
+    if not event:
+        return None, event
+    return _pick(event, list((await session.exec(_candidates(event))).all())), event
+
+
+def lookup_event_id(session: Session, event: str) -> Optional[str]:
+    """Id of the event a free-text value refers to, None when it matches no single event."""
+    return _pick(event, list(session.exec(_candidates(event)).all()))
+
+
+def event_clause(event: Optional[str], event_id: Optional[str]):
+    """Tickets of a linked event by event_id; unlinked free text is compared as before."""
+    if event_id is None:
+        return Ticket.event == event
+    return Ticket.event_id == event_id
+
+
+def ticket_event_filter(session: Session, event: str):
+    """WHERE clause for tickets of an event given by id or name."""
+    return event_clause(event, lookup_event_id(session, event))
+
+
+def link_tickets(session: Session, event: Event) -> int:
+    """
+    Attach unlinked tickets that name a newly created event in their free-text field.
+    Skipped when another event already has the same name, since the text cannot tell them apart.
+    """
+    keys = [event.id]
+    same_name = session.exec(select(Event.id).where(Event.name == event.name, Event.id != event.id).limit(1)).first()
+    if same_name is None:
+        keys.append(event.name)
+    result = session.execute(
+        update(Ticket)
+        .where(Ticket.event_id.is_(None), Ticket.event.in_(keys))
+        .values(event_id=event.id)
+    )
+    return result.rowcount
@@ -0,0 +1,115 @@
+import csv
+import io
+import logging
+import os
+from datetime import datetime
+from typing import Iterator, Optional
+
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.models.ticket import Ticket, TicketResponse
+from app.services.events import ticket_event_filter
+from app.services.qr import generate_qr_base64, qr_field
+from app.services.qr_payload import qr_payload
+from app.utils.dates import as_utc
+
+log = logging.getLogger("uvicorn.error")
+
+# Rows fetched per round trip by the server-side cursor, and rows per streamed CSV chunk
+STREAM_BATCH = int(os.getenv("EXPORT_STREAM_BATCH", "1000"))
+
+CSV_FIELDS = list(TicketResponse.model_fields)
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def export_query(
+    session: Session,
+    used: Optional[bool] = None,
+    event: Optional[str] = None,
+    scanned_by: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    """SELECT of the tickets matching the export filters."""
+    query = select(Ticket)
+    if used is not None:
+        query = query.where(Ticket.used == used)
+    if event:
+        query = query.where(ticket_event_filter(session, event))
+    if scanned_by:
+        query = query.where(Ticket.scanned_by == scanned_by)
+    if start:
+        query = query.where(Ticket.scanned_at >= as_utc(start))
+    if end:
+        query = query.where(Ticket.scanned_at <= as_utc(end))
+    return query
+
+
+def export_qr(t: Ticket, qr: str = "inline") -> str:
+    """Inline QR codes are bare base64 PNG in exports, unlike the data URIs of the ticket routes."""
+    return generate_qr_base64(qr_payload(t.ticket_id, t.event)) if qr == "inline" else qr_field(t.ticket_id, t.event, qr)
+
+
+def export_row(t: Ticket, qr: str = "inline") -> TicketResponse:
+    """One exported ticket."""
+    return TicketResponse(
+        ticket_number=t.ticket_number,
+        name=t.name,
+        id_card_number=t.id_card_number,
+        date_of_birth=t.date_of_birth,
+        phone_number=t.phone_number,
+        ticket_id=t.ticket_id,
+        qr=export_qr(t, qr),
+        status="already_checked_in" if t.used else "valid",
+        event=t.event,
+        event_id=t.event_id,
+        timestamp=t.scanned_at
+    )
+
+
+def stream_rows(bind: Engine, query, qr: str = "inline") -> Iterator[TicketResponse]:
+    """
+    Export rows read through a server-side cursor, STREAM_BATCH at a time.
+    Uses its own session on `bind`; the route's read session is function-scoped and
+    already closed, so a streamed export holds a single connection.
+    """
+    with Session(bind) as session:
+        for t in session.exec(query.execution_options(yield_per=STREAM_BATCH)):
+            yield export_row(t, qr)
+
+
+def ndjson_lines(rows: Iterator[TicketResponse]) -> Iterator[str]:
+    for row in rows:
+        yield row.model_dump_json() + "\n"
+
+
+def csv_chunks(rows: Iterator[TicketResponse]) -> Iterator[str]:
+    """Header first, so the client gets a byte immediately, then STREAM_BATCH rows per chunk."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    pending = 0
+    for row in rows:
+        writer.writerow(row.model_dump(mode="json"))
+        pending += 1
+        if pending >= STREAM_BATCH:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if pending:
+        yield buffer.getvalue()
+
+
+def stream_export(bind: Engine, query, fmt: str, qr: str = "inline") -> Iterator[str]:
+    """Body of a streamed export. Errors after the first byte can only abort the response, so they are logged and re-raised."""
+    encode = csv_chunks if fmt == "csv" else ndjson_lines
+    try:
+        yield from encode(stream_rows(bind, query, qr))
+    except Exception as e:
+        log.error("Error streaming /admin/export as %s: %s", fmt, e)
+        raise
@@ -0,0 +1,152 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlmodel import Session, select, func
+
+from app.db.engine import engine
+from app.models.ticket import Ticket
+
+RECENT_SCANS = 20
+
+
+class LiveChannel:
+    """
+    Check-in counters for one event, shared by all of its subscribers.
+    The JSON snapshot is rendered once per change, however many clients are listening.
+    """
+
+    def __init__(self, event_id: str):
+        self.event_id = event_id
+        self.subscribers = 0
+        self.total = 0
+        self.checked_in = 0
+        self.by_scanner: Dict[str, int] = {}
+        self.recent: deque = deque(maxlen=RECENT_SCANS)
+        self.version = 0
+        self.loaded_at: Optional[float] = None
+        self._rendered: Optional[str] = None
+        self._rendered_version = -1
+        self._lock = threading.Lock()
+        self._reloading = False
+
+    def reload(self) -> None:
+        """Replace counters with the database state, which also covers scans handled by other workers."""
+        with Session(engine) as session:
+            in_event = Ticket.event_id == self.event_id
+            total = session.exec(select(func.count()).select_from(Ticket).where(in_event)).one()
+            per_scanner = session.exec(
+                select(Ticket.scanned_by, func.count())
+                .where(in_event, Ticket.used == True)  # noqa: E712
+                .group_by(Ticket.scanned_by)
+            ).all()
+            recent = session.exec(
+                select(Ticket.ticket_id, Ticket.ticket_number, Ticket.name, Ticket.scanned_by, Ticket.scanned_at)
+                .where(in_event, Ticket.used == True)  # noqa: E712
+                .order_by(Ticket.scanned_at.desc())
+                .limit(RECENT_SCANS)
+            ).all()
+
+        with self._lock:
+            self.total = total
+            self.by_scanner = {str(scanner): count for scanner, count in per_scanner}
+            self.checked_in = sum(self.by_scanner.values())
+            self.recent = deque(
+                (_scan_entry(*row) for row in reversed(recent)),
+                maxlen=RECENT_SCANS,
+            )
+            self.version += 1
+            self.loaded_at = time.monotonic()
+
+    def claim_reload(self, max_age: float) -> bool:
+        """True for exactly one caller once the counters are older than max_age seconds."""
+        with self._lock:
+            if self._reloading:
+                return False
+            if self.loaded_at is not None and time.monotonic() - self.loaded_at < max_age:
+                return False
+            self._reloading = True
+            return True
+
+    def reload_done(self) -> None:
+        with self._lock:
+            self._reloading = False
+
+    def record(self, ticket_id: str, ticket_number: Optional[str], name: Optional[str],
+               scanner_id: Optional[str], scanned_at: Optional[datetime]) -> None:
+        with self._lock:
+            self.checked_in += 1
+            key = str(scanner_id)
+            self.by_scanner[key] = self.by_scanner.get(key, 0) + 1
+            self.recent.append(_scan_entry(ticket_id, ticket_number, name, scanner_id, scanned_at))
+            self.version += 1
+
+    def snapshot(self) -> tuple:
+        """(version, JSON text) of the current counters."""
+        with self._lock:
+            if self._rendered_version != self.version:
+                self._rendered = json.dumps({
+                    "event_id": self.event_id,
+                    "version": self.version,
+                    "total": self.total,
+                    "checked_in": self.checked_in,
+                    "by_scanner": self.by_scanner,
+                    "recent": list(reversed(self.recent)),
+                })
+                self._rendered_version = self.version
+            return self._rendered_version, self._rendered
+
+
+def _scan_entry(ticket_id, ticket_number, name, scanner_id, scanned_at) -> dict:
+    return {
+        "ticket_id": ticket_id,
+        "ticket_number": ticket_number,
+        "name": name,
+        "scanned_by": scanner_id,
+        "scanned_at": scanned_at.isoformat() if scanned_at is not None else None,
+    }
+
+
+class LiveHub:
+    """
+    In-process pub/sub between the scan code path and /events/{id}/live subscribers.
+    Scans of events nobody is watching cost a single dict lookup.
+    """
+
+    def __init__(self, interval: float = 1.0, resync_interval: float = 30.0):
+        self.interval = interval
+        self.resync_interval = resync_interval
+        self._channels: Dict[str, LiveChannel] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, event_id: str) -> LiveChannel:
+        with self._lock:
+            channel = self._channels.get(event_id)
+            if channel is None:
+                channel = LiveChannel(event_id)
+                self._channels[event_id] = channel
+            channel.subscribers += 1
+            return channel
+
+    def unsubscribe(self, channel: LiveChannel) -> None:
+        with self._lock:
+            channel.subscribers -= 1
+            if channel.subscribers <= 0 and self._channels.get(channel.event_id) is channel:
+                del self._channels[channel.event_id]
+
+    def publish_scan(self, event_id: Optional[str], ticket_id: str, ticket_number: Optional[str],
+                     name: Optional[str], scanner_id: Optional[str], scanned_at: Optional[datetime]) -> None:
+        """Tickets not linked to an event (event_id is None) have no live channel."""
+        channel = self._channels.get(event_id) if event_id is not None else None
+        if channel is not None:
+            channel.record(ticket_id, ticket_number, name, scanner_id, scanned_at)
+
+
+live = LiveHub(
+    interval=float(os.getenv("LIVE_UPDATE_INTERVAL", "1.0")),
+    resync_interval=float(os.getenv("LIVE_RESYNC_INTERVAL", "30")),
+)
@@ -0,0 +1,122 @@
+import struct
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from sqlmodel import Session, select
+
+from app.models.ticket import Ticket
+
+# Binary layout, all integers little-endian:
+#   header  "TKM1" | u8 kind (0 = full, 1 = delta) | u64 version | u64 base version (0 for full)
+#   full    u32 n | n x 16-byte ticket UUIDs, sorted | ceil(n / 8) bytes used bitmap (bit i = ticket i)
+#   delta   four sections, each u32 n | n x 16-byte UUIDs:
+#           added (followed by a used bitmap for the added tickets), removed, now used, now unused
+MAGIC = b"TKM1"
+FULL = 0
+DELTA = 1
+HEADER = struct.Struct("<4sBQQ")
+COUNT = struct.Struct("<I")
+
+Snapshot = Dict[bytes, bool]  # 16-byte ticket UUID -> used
+
+
+def _bitmap(flags: List[bool]) -> bytes:
+    bits = bytearray((len(flags) + 7) // 8)
+    for i, used in enumerate(flags):
+        if used:
+            bits[i >> 3] |= 1 << (i & 7)
+    return bytes(bits)
+
+
+def _ids(ids: List[bytes]) -> bytes:
+    return COUNT.pack(len(ids)) + b"".join(ids)
+
+
+def load_snapshot(session: Session, event_id: str) -> Snapshot:
+    """Ticket ids and used state of an event; ids that are not UUIDs cannot be represented and are skipped."""
+    rows = session.exec(select(Ticket.ticket_id, Ticket.used).where(Ticket.event_id == event_id)).all()
+    snapshot: Snapshot = {}
+    for ticket_id, used in rows:
+        try:
+            snapshot[uuid.UUID(ticket_id).bytes] = bool(used)
+        except ValueError:
+            continue
+    return snapshot
+
+
+def snapshot_version(snapshot: Snapshot) -> int:
+    """Content-derived version: identical state always gets the same number."""
+    digest = hashlib.blake2b(digest_size=8)
+    for ticket_id in sorted(snapshot):
+        digest.update(ticket_id)
+        digest.update(b"\x01" if snapshot[ticket_id] else b"\x00")
+    return int.from_bytes(digest.digest(), "little") or 1
+
+
+def encode_full(snapshot: Snapshot, version: int) -> bytes:
+    ids = sorted(snapshot)
+    return HEADER.pack(MAGIC, FULL, version, 0) + _ids(ids) + _bitmap([snapshot[i] for i in ids])
+
+
+def encode_delta(base: Snapshot, snapshot: Snapshot, base_version: int, version: int) -> bytes:
+    added = sorted(i for i in snapshot if i not in base)
+    removed = sorted(i for i in base if i not in snapshot)
+    now_used = sorted(i for i in snapshot if i in base and snapshot[i] and not base[i])
+    now_unused = sorted(i for i in snapshot if i in base and not snapshot[i] and base[i])
+    return b"".join([
+        HEADER.pack(MAGIC, DELTA, version, base_version),
+        _ids(added),
+        _bitmap([snapshot[i] for i in added]),
+        _ids(removed),
+        _ids(now_used),
+        _ids(now_unused),
+    ])
+
+
+class ManifestStore:
+    """
+    Remembers the last few snapshots served per event so that
+    `since_version` requests can be answered with a delta.
+    An unknown base version (evicted, or served by another worker) gets a full manifest.
+    """
+
+    def __init__(self, max_snapshots: int = 16):
+        self.max_snapshots = max_snapshots
+        self._snapshots: "OrderedDict[Tuple[str, int], Snapshot]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def remember(self, event_id: str, version: int, snapshot: Snapshot) -> None:
+        with self._lock:
+            self._snapshots[(event_id, version)] = snapshot
+            self._snapshots.move_to_end((event_id, version))
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+
+    def get(self, event_id: str, version: int) -> Optional[Snapshot]:
+        with self._lock:
+            return self._snapshots.get((event_id, version))
+
+
+manifests = ManifestStore()
+
+
+def build_manifest(session: Session, event_id: str, since_version: Optional[int] = None) -> Tuple[int, Optional[bytes]]:
+    """
+    Return (version, body) for an event's manifest.
+    body is None when the client already holds the current version.
+    """
+    snapshot = load_snapshot(session, event_id)
+    version = snapshot_version(snapshot)
+    manifests.remember(event_id, version, snapshot)
+
+    if since_version is not None:
+        if since_version == version:
+            return version, None
+        base = manifests.get(event_id, since_version)
+        if base is not None:
+            return version, encode_delta(base, snapshot, since_version, version)
+
+    return version, encode_full(snapshot, version)
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import threading
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.counter import TicketCounter
+from app.models.ticket import Ticket
+
+# ticket.ticket_number is unique across the whole table, so all events
+# draw from the same scope.
+DEFAULT_SCOPE = "ticket"
+TICKET_NUMBER_WIDTH = 4
+
+
+def format_ticket_number(value: int) -> str:
+    return str(value).zfill(TICKET_NUMBER_WIDTH)
+
+
+def _current_max_ticket_number(session: Session) -> int:
+    """
+    Highest numeric ticket_number already issued.
+    Only used once, to seed a counter row that does not exist yet.
+    """
+    rows = session.exec(
+        select(Ticket.ticket_number)
+        .where(Ticket.ticket_number.is_not(None))
+        .order_by(func.length(Ticket.ticket_number).desc(), Ticket.ticket_number.desc())
+        .limit(50)
+    ).all()
+    for value in rows:
+        try:
+            return int(value)
+        except (ValueError, TypeError):
+            continue
+    return 0
+
+
+def _seed_counter(session: Session, scope: str) -> None:
+    start = _current_max_ticket_number(session)
+    try:
+        with session.begin_nested():
+            session.add(TicketCounter(scope=scope, value=start))
+    except IntegrityError:
+        # Another worker seeded it first
+        pass
+
+
+def allocate_ticket_numbers(session: Session, count: int = 1, scope: str = DEFAULT_SCOPE) -> range:
+    """
+    Reserve `count` consecutive ticket numbers in a single statement.
+    The counter row stays locked until the caller's transaction ends,
+    so concurrent registrations can never receive the same number.
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+
+    stmt = (
+        update(TicketCounter)
+        .where(TicketCounter.scope == scope)
+        .values(value=TicketCounter.value + count)
+        .returning(TicketCounter.value)
+    )
+    last = session.execute(stmt).scalar_one_or_none()
+    if last is None:
+        _seed_counter(session, scope)
+        last = session.execute(stmt).scalar_one()
+
+    return range(last - count + 1, last + 1)
+
+
+class TicketNumberAllocator:
+    """
+    Hands out ticket numbers from a per-process block.
+    With block_size > 1 each refill is committed in its own short transaction,
+    so workers stop contending on the counter row at the cost of gaps and
+    non-chronological numbers across workers.
+    Sync callers (threadpool) use next(); async routes use next_async(), which
+    waits on an asyncio.Lock so a refill never blocks the event loop.
+    """
+
+    def __init__(self, block_size: int = 1, scope: str = DEFAULT_SCOPE):
+        self.block_size = max(1, block_size)
+        self.scope = scope
+        self._block = iter(())
+        self._lock = threading.Lock()
+        self._async_block = iter(())
+        self._async_lock = asyncio.Lock()
+
+    def next(self, session: Session) -> str:
+        if self.block_size == 1:
+            return format_ticket_number(allocate_ticket_numbers(session, 1, self.scope)[0])
+
+        with self._lock:
+            value = next(self._block, None)
+            if value is None:
+                with Session(session.get_bind()) as counter_session:
+                    block = allocate_ticket_numbers(counter_session, self.block_size, self.scope)
+                    counter_session.commit()
+                self._block = iter(block)
+                value = next(self._block)
+            return format_ticket_number(value)
+
+    def _allocate(self, session: Session, count: int) -> range:
+        return allocate_ticket_numbers(session, count, self.scope)
+
+    async def next_async(self, session: AsyncSession) -> str:
+        if self.block_size == 1:
+            return format_ticket_number((await session.run_sync(self._allocate, 1))[0])
+
+        async with self._async_lock:
+            value = next(self._async_block, None)
+            if value is None:
+                async with AsyncSession(session.bind) as counter_session:
+                    block = await counter_session.run_sync(self._allocate, self.block_size)
+                    await counter_session.commit()
+                self._async_block = iter(block)
+                value = next(self._async_block)
+            return format_ticket_number(value)
+
+
+ticket_numbers = TicketNumberAllocator(
+    block_size=int(os.getenv("TICKET_NUMBER_BLOCK_SIZE", "1")),
+)
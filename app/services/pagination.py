@@ -0,0 +1,85 @@
+import base64
+import json
+import os
+from typing import Any, List, Literal, Optional, Tuple
+
+from sqlalchemy import func, literal_column, tuple_
+from sqlmodel import Session
+
+from app.models.ticket import Ticket
+
+DEFAULT_PAGE_SIZE = int(os.getenv("PAGE_SIZE_DEFAULT", "100"))
+MAX_PAGE_SIZE = int(os.getenv("PAGE_SIZE_MAX", "1000"))
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+PageOrder = Literal["ticket_id", "event"]
+PAGE_ORDER_DESCRIPTION = "ticket_id, or event for (event, ticket_number) order"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def order_columns(order: str) -> tuple:
+    """
+    Sort key of each page order, always ending in ticket_id so it is unique.
+    NULLs are folded to '' to keep row-value comparison total; the same expressions
+    back ix_ticket_page_event, so a page starts with an index seek however deep it is.
+    """
+    if order == "event":
+        return (
+            func.coalesce(Ticket.event, literal_column("''")),
+            func.coalesce(Ticket.ticket_number, literal_column("''")),
+            Ticket.ticket_id,
+        )
+    return (Ticket.ticket_id,)
+
+
+def _key(ticket: Ticket, order: str) -> List[Any]:
+    if order == "event":
+        return [ticket.event or "", ticket.ticket_number or "", ticket.ticket_id]
+    return [ticket.ticket_id]
+
+
+def encode_cursor(order: str, key: List[Any]) -> str:
+    raw = json.dumps({"o": order, "k": key}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str, order: str) -> List[Any]:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        key = data["k"]
+        cursor_order = data["o"]
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+    if cursor_order != order:
+        raise InvalidCursor(f"Cursor was issued for order={cursor_order}")
+    # Every sort key column is text; anything else would reach the database as a bind error
+    if (
+        not isinstance(key, list)
+        or len(key) != len(order_columns(order))
+        or not all(isinstance(value, str) for value in key)
+    ):
+        raise InvalidCursor("Invalid cursor")
+    return key
+
+
+def paginate(
+    session: Session, query, order: str = "ticket_id", limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+) -> Tuple[List[Ticket], Optional[str]]:
+    """
+    One page of `query` in keyset order: WHERE (sort key) > (last key of the previous page).
+    Fetches one row more than asked to know whether there is a next page.
+    Returns (tickets, next cursor or None on the last page).
+    """
+    columns = order_columns(order)
+    if cursor:
+        key = decode_cursor(cursor, order)
+        query = query.where(tuple_(*columns) > tuple_(*key) if len(columns) > 1 else columns[0] > key[0])
+    rows = list(session.exec(query.order_by(*columns).limit(limit + 1)).all())
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(order, _key(rows[-1], order))
@@ -0,0 +1,94 @@
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+from app.utils.metrics import latency_summary
+
+LATENCY_SAMPLES = 512
+
+
+class PoolBusy(Exception):
+    """Raised instead of queueing when too many password operations are already pending."""
+    pass
+
+
+class PasswordPool:
+    """
+    Dedicated executor for bcrypt work, so a login burst is limited to `workers`
+    CPU-bound threads instead of taking over the request threadpool.
+    Submissions beyond `max_pending` (running + queued) are rejected immediately.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 32):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._latency: Dict[str, deque] = {}
+        self._waits: deque = deque(maxlen=LATENCY_SAMPLES)
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PoolBusy(f"{self._pending} password operations pending")
+            self._pending += 1
+
+    def _timed(self, op: str, fn: Callable, args: tuple, submitted: float):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self.completed += 1
+                self._waits.append(started - submitted)
+                self._latency.setdefault(op, deque(maxlen=LATENCY_SAMPLES)).append(finished - started)
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def submit(self, op: str, fn: Callable, *args):
+        self._admit()
+        try:
+            future = self._executor.submit(self._timed, op, fn, args, time.perf_counter())
+        except Exception:
+            self._release()
+            raise
+        # Also runs when a queued call is cancelled (e.g. its client went away) and _timed never starts
+        future.add_done_callback(self._release)
+        return future
+
+    def run(self, op: str, fn: Callable, *args):
+        """Blocking call for sync code paths."""
+        return self.submit(op, fn, *args).result()
+
+    async def run_async(self, op: str, fn: Callable, *args):
+        return await asyncio.wrap_future(self.submit(op, fn, *args))
+
+    def stats(self) -> dict:
+        with self._lock:
+            latency = {op: latency_summary(samples) for op, samples in self._latency.items()}
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "queue_wait_ms": latency_summary(self._waits),
+                "latency_ms": latency,
+            }
+
+
+password_pool = PasswordPool(
+    workers=int(os.getenv("BCRYPT_WORKERS", "2")),
+    max_pending=int(os.getenv("BCRYPT_MAX_PENDING", "32")),
+)
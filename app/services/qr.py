@@ -1,27 +1,168 @@
-import qrcode
+import os
 import io
 import base64
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
 
-def generate_qr(data: str) -> str:
+from app.services.qr_payload import qr_payload
+
+# qrcode (and PIL, which it pulls in) is imported on first render, not at startup
+ERROR_CORRECTION_LEVELS = ("L", "M", "Q", "H")
+
+MEDIA_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+
+QRKey = Tuple[str, str, int, int, str]
+
+
+class QRCache:
     """
-    Generate a PNG QR code as a data URI.
-    Uses fit=True so the QR version auto-scales to your data length.
+    Bounded LRU cache of encoded QR images.
+    Evicts least recently used entries once either the entry count
+    or the total byte size exceeds its limit.
+    """
+
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[QRKey, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: QRKey) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: QRKey, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = value
+            self._bytes += len(value)
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+qr_cache = QRCache(
+    max_entries=int(os.getenv("QR_CACHE_MAX_ENTRIES", "4096")),
+    max_bytes=int(os.getenv("QR_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+)
+
+
+def render_qr(
+    data: str,
+    error_correction: str = "M",
+    box_size: int = 10,
+    border: int = 4,
+    fmt: str = "png",
+) -> bytes:
     """
+    Return the encoded QR image for `data`, computing it at most once per process.
+    The cache key covers every parameter that changes the output bytes.
+    """
+    if fmt not in MEDIA_TYPES:
+        raise ValueError(f"Unsupported QR format: {fmt}")
+    if error_correction not in ERROR_CORRECTION_LEVELS:
+        raise ValueError(f"Unsupported error correction level: {error_correction}")
+
+    key = (data, error_correction, box_size, border, fmt)
+    cached = qr_cache.get(key)
+    if cached is not None:
+        return cached
+
+    import qrcode
+    import qrcode.image.svg
+
     qr = qrcode.QRCode(
         version=None,  # let the library choose the smallest version
-        error_correction=qrcode.constants.ERROR_CORRECT_M,
-        box_size=10,
-        border=4,
+        error_correction=getattr(qrcode.constants, f"ERROR_CORRECT_{error_correction}"),
+        box_size=box_size,
+        border=border,
     )
     qr.add_data(data)
     qr.make(fit=True)  # auto-size the QR for your payload
 
-    img = qr.make_image(fill_color="black", back_color="white")
-
-    # Convert to base64 data URI
     buffered = io.BytesIO()
-    img.save(buffered, format="PNG")
-    img_bytes = buffered.getvalue()
-    img_b64 = base64.b64encode(img_bytes).decode("utf-8")
+    if fmt == "svg":
+        img = qr.make_image(image_factory=qrcode.image.svg.SvgPathImage)
+        img.save(buffered)
+    else:
+        img = qr.make_image(fill_color="black", back_color="white")
+        img.save(buffered, format="PNG")
+
+    value = buffered.getvalue()
+    qr_cache.put(key, value)
+    return value
+
+
+def generate_qr_base64(data: str) -> str:
+    """Return the default PNG QR code for `data` as bare base64."""
+    return base64.b64encode(render_qr(data)).decode("utf-8")
+
+
+def generate_qr(data: str) -> str:
+    """
+    Generate a PNG QR code as a data URI.
+    Uses fit=True so the QR version auto-scales to your data length.
+    """
+    return f"data:image/png;base64,{generate_qr_base64(data)}"
+
+
+def qr_url(ticket_id: str, fmt: str = "png") -> str:
+    """Path of the cacheable binary QR endpoint for a ticket."""
+    return f"/api/tickets/{ticket_id}/qr.{fmt}"
 
-    return f"data:image/png;base64,{img_b64}"
+
+def ticket_qr(ticket_id: str, event: Optional[str]) -> str:
+    """PNG data URI of a ticket's QR, signed when QR signing keys are configured."""
+    return generate_qr(qr_payload(ticket_id, event))
+
+
+def qr_field(ticket_id: str, event: Optional[str], mode: str = "inline") -> str:
+    """
+    Value for the `qr` field of a ticket response.
+    inline -> PNG data URI, url -> link to the binary endpoint, none -> empty.
+    """
+    if mode == "url":
+        return qr_url(ticket_id)
+    if mode == "none":
+        return ""
+    return ticket_qr(ticket_id, event)
@@ -0,0 +1,124 @@
+import os
+import hmac
+import base64
+import hashlib
+import uuid
+from typing import Dict, NamedTuple, Optional
+
+# Signed payload layout: TK1.<key id>.<ticket id>.<event>.<tag>
+# ticket id is the 16 raw UUID bytes, event is UTF-8, both base64url without padding;
+# tag is the first 16 bytes of HMAC-SHA256 over everything before the last dot.
+PREFIX = "TK1"
+TAG_BYTES = 16
+
+
+class InvalidPayload(Exception):
+    pass
+
+
+class QRPayload(NamedTuple):
+    ticket_id: str
+    event: Optional[str]
+    key_id: Optional[str]  # None for legacy unsigned payloads
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _load_keys(spec: str) -> Dict[str, bytes]:
+    """Parse QR_SIGNING_KEYS, e.g. "k2:new-secret,k1:old-secret"."""
+    keys = {}
+    for item in spec.split(","):
+        kid, sep, secret = item.strip().partition(":")
+        if sep and kid and secret and "." not in kid:
+            keys[kid] = secret.encode("utf-8")
+    return keys
+
+
+class QRSigner:
+    """
+    Signs ticket QR payloads and verifies them before any database access.
+    Every configured key is accepted for verification, so a key can be rotated
+    by adding the new one first, switching `active_key_id`, then dropping the old one.
+    """
+
+    def __init__(self, keys: Dict[str, bytes], active_key_id: Optional[str] = None, accept_unsigned: bool = True):
+        self.keys = keys
+        self.active_key_id = active_key_id or next(iter(keys), None)
+        self.accept_unsigned = accept_unsigned
+        if self.active_key_id is not None and self.active_key_id not in keys:
+            raise ValueError(f"QR signing key {self.active_key_id!r} is not configured")
+
+    @property
+    def enabled(self) -> bool:
+        return self.active_key_id is not None
+
+    def _tag(self, key: bytes, message: str) -> str:
+        return _b64encode(hmac.new(key, message.encode("ascii"), hashlib.sha256).digest()[:TAG_BYTES])
+
+    def sign(self, ticket_id: str, event: Optional[str]) -> str:
+        """Payload to encode in a ticket's QR; the bare ticket_id when signing is off."""
+        if not self.enabled:
+            return ticket_id
+        try:
+            ticket_bytes = uuid.UUID(ticket_id).bytes
+        except ValueError:
+            return ticket_id
+        message = ".".join([
+            PREFIX,
+            self.active_key_id,
+            _b64encode(ticket_bytes),
+            _b64encode((event or "").encode("utf-8")),
+        ])
+        return f"{message}.{self._tag(self.keys[self.active_key_id], message)}"
+
+    def verify(self, payload: str) -> QRPayload:
+        """Return the ticket a scanned payload refers to, or raise InvalidPayload."""
+        payload = (payload or "").strip()
+        if not payload.startswith(PREFIX + "."):
+            return self._legacy(payload)
+
+        parts = payload.split(".")
+        if len(parts) != 5 or not payload.isascii():
+            raise InvalidPayload("Malformed signed payload")
+        _, key_id, ticket_part, event_part, tag = parts
+
+        key = self.keys.get(key_id)
+        if key is None:
+            raise InvalidPayload("Unknown signing key")
+        message = payload[: -(len(tag) + 1)]
+        if not hmac.compare_digest(self._tag(key, message), tag):
+            raise InvalidPayload("Bad signature")
+
+        try:
+            ticket_id = str(uuid.UUID(bytes=_b64decode(ticket_part)))
+            event = _b64decode(event_part).decode("utf-8") or None
+        except (ValueError, UnicodeDecodeError):
+            raise InvalidPayload("Malformed signed payload")
+        return QRPayload(ticket_id, event, key_id)
+
+    def _legacy(self, payload: str) -> QRPayload:
+        if not self.accept_unsigned:
+            raise InvalidPayload("Unsigned payloads are not accepted")
+        # Ticket ids are always UUIDs, so anything else can be rejected without a lookup
+        try:
+            uuid.UUID(payload)
+        except ValueError:
+            raise InvalidPayload("Not a ticket id")
+        return QRPayload(payload, None, None)
+
+
+signer = QRSigner(
+    keys=_load_keys(os.getenv("QR_SIGNING_KEYS", "")),
+    active_key_id=os.getenv("QR_SIGNING_KEY_ID") or None,
+    accept_unsigned=os.getenv("QR_ACCEPT_UNSIGNED", "true").lower() in ("1", "true", "yes"),
+)
+
+
+def qr_payload(ticket_id: str, event: Optional[str]) -> str:
+    return signer.sign(ticket_id, event)
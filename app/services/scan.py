@@ -0,0 +1,140 @@
+import logging
+from datetime import datetime, timezone
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import update, bindparam
+from sqlmodel import Session, select
+
+from app.models.ticket import Ticket, ScanRecord, ScanOutcome
+from app.services.admission import admission
+from app.services.live import live
+from app.utils.dates import as_utc
+
+log = logging.getLogger("uvicorn.error")
+
+SCAN_BATCH_CHUNK = 1000
+
+
+class ScanResult(NamedTuple):
+    status: str  # "valid" | "already_checked_in" | "not_found"
+    ticket: Optional[Ticket]
+
+
+def scan_ticket_once(session: Session, ticket_id: str, scanner_id: Optional[str], event_id: Optional[str] = None) -> ScanResult:
+    """
+    Admit a ticket with a single conditional UPDATE ... RETURNING.
+    Only the first of any number of concurrent scans matches `used = false`;
+    the ticket is read back only when nothing was updated.
+    Tickets of events with an active admission index are answered from memory.
+    With event_id, the database lookup only considers that event's tickets,
+    which confines it to one partition of a partitioned ticket table.
+    """
+    try:
+        admitted = admission.scan(ticket_id, scanner_id, event_id)
+    except Exception as e:
+        log.error("Admission index failed for ticket_id=%s, using database: %s", ticket_id, e)
+        admitted = None
+    if admitted is not None:
+        result = ScanResult(*admitted)
+        if result.status == "valid":
+            _publish(result.ticket, scanner_id)
+        return result
+
+    stmt = (
+        update(Ticket)
+        .where(Ticket.ticket_id == ticket_id, Ticket.used == False, *_in_event(event_id))  # noqa: E712
+        .values(
+            used=True,
+            scanned_at=datetime.now(timezone.utc),
+            scanned_by=scanner_id,
+        )
+        .returning(*Ticket.__table__.columns)
+    )
+    row = session.execute(stmt).mappings().first()
+    session.commit()
+
+    if row is not None:
+        ticket = Ticket(**row)
+        _publish(ticket, scanner_id)
+        return ScanResult("valid", ticket)
+
+    existing = session.exec(select(Ticket).where(Ticket.ticket_id == ticket_id, *_in_event(event_id))).first()
+    if not existing:
+        return ScanResult("not_found", None)
+    return ScanResult("already_checked_in", existing)
+
+
+def _in_event(event_id: Optional[str]) -> list:
+    return [Ticket.event_id == event_id] if event_id else []
+
+
+def _publish(ticket: Ticket, scanner_id: Optional[str]) -> None:
+    """Feed a successful admission to live check-in subscribers."""
+    live.publish_scan(ticket.event_id, ticket.ticket_id, ticket.ticket_number, ticket.name, scanner_id, ticket.scanned_at)
+
+
+def apply_scan_batch(session: Session, scans: List[ScanRecord], scanner_id: Optional[str], event_id: Optional[str] = None) -> List[ScanOutcome]:
+    """
+    Apply scans buffered by an offline device in one transaction.
+    Scans are replayed in scanned_at order so the earliest scan of a ticket wins,
+    also over a later scan that another gate already recorded online.
+    Outcomes are returned in the order the scans were submitted.
+    """
+    # Persist in-memory admissions first so they take part in the ordering
+    admission.flush()
+
+    ticket_ids = sorted({scan.ticket_id for scan in scans})
+    state = {}
+    details = {}
+    for i in range(0, len(ticket_ids), SCAN_BATCH_CHUNK):
+        rows = session.exec(
+            select(Ticket.ticket_id, Ticket.used, Ticket.scanned_at, Ticket.event_id, Ticket.ticket_number, Ticket.name)
+            .where(Ticket.ticket_id.in_(ticket_ids[i:i + SCAN_BATCH_CHUNK]), *_in_event(event_id))
+            .order_by(Ticket.ticket_id)
+            .with_for_update()
+        ).all()
+        for ticket_id, used, scanned_at, ticket_event_id, ticket_number, name in rows:
+            state[ticket_id] = as_utc(scanned_at) if used else None
+            details[ticket_id] = (ticket_event_id, ticket_number, name, used)
+
+    outcomes: List[Optional[ScanOutcome]] = [None] * len(scans)
+    winners = {}
+    for i in sorted(range(len(scans)), key=lambda i: as_utc(scans[i].scanned_at)):
+        scan = scans[i]
+        at = as_utc(scan.scanned_at)
+
+        if scan.ticket_id not in state:
+            status = "not_found"
+        elif scan.ticket_id in winners:
+            status = "already_checked_in"
+        else:
+            recorded = state[scan.ticket_id]
+            if recorded is not None and recorded <= at:
+                status = "already_checked_in"
+            else:
+                status = "valid"
+                winners[scan.ticket_id] = at
+
+        outcomes[i] = ScanOutcome(
+            ticket_id=scan.ticket_id,
+            device_id=scan.device_id,
+            scanned_at=at.isoformat(),
+            status=status,
+        )
+
+    if winners:
+        table = Ticket.__table__
+        session.execute(
+            update(table)
+            .where(table.c.ticket_id == bindparam("b_ticket_id"), *_in_event(event_id))
+            .values(used=True, scanned_at=bindparam("b_scanned_at"), scanned_by=scanner_id),
+            [{"b_ticket_id": ticket_id, "b_scanned_at": at} for ticket_id, at in winners.items()],
+        )
+    session.commit()
+
+    for ticket_id, at in winners.items():
+        admission.mark_used(ticket_id, at)
+        ticket_event_id, ticket_number, name, was_used = details[ticket_id]
+        if not was_used:
+            live.publish_scan(ticket_event_id, ticket_id, ticket_number, name, scanner_id, at)
+    return outcomes
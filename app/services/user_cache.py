@@ -0,0 +1,208 @@
+import os
+import time
+import select
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import event, inspect, text
+
+from app.db.engine import engine
+from app.models.user import User
+from app.utils.auth import PERMISSION_CLAIM_SECONDS
+
+log = logging.getLogger("uvicorn.error")
+
+# Postgres LISTEN/NOTIFY channel used to evict users in every worker
+INVALIDATION_CHANNEL = "user_invalidation"
+
+# Columns kept per cached user; enough to rebuild the User that routes receive
+CACHED_FIELDS = ("id", "email", "role", "token_version", "is_active", "created_at", "last_login")
+# Changes to these columns must take effect on the next request
+AUTH_FIELDS = ("role", "token_version", "is_active")
+
+
+class UserCache:
+    """
+    TTL-bounded LRU of authenticated users, keyed by user id.
+    The TTL caps how long a missed invalidation can go unnoticed.
+
+    Invalidations are also remembered for `revocation_window` seconds (the
+    lifetime of token permission claims) so that claims issued before the
+    change stop being trusted.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 30.0, revocation_window: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.revocation_window = revocation_window
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._revoked: "OrderedDict[str, float]" = OrderedDict()
+        self._revoked_all = 0.0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, user_id: str) -> Optional[User]:
+        if self.ttl <= 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            fields = entry[1]
+        # A fresh transient instance per request, so routes cannot share state through it
+        return User(**fields)
+
+    def put(self, user: User) -> None:
+        if self.ttl <= 0:
+            return
+        fields = {name: getattr(user, name) for name in CACHED_FIELDS}
+        fields["hashed_password"] = ""
+        with self._lock:
+            self._entries[user.id] = (time.monotonic() + self.ttl, fields)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id: str) -> None:
+        now = time.time()
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+            self._revoked.pop(user_id, None)
+            self._revoked[user_id] = now
+            # Oldest first, so expired revocations are at the front
+            while self._revoked and next(iter(self._revoked.values())) < now - self.revocation_window:
+                self._revoked.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop everything, e.g. after invalidations may have been missed."""
+        with self._lock:
+            self._entries.clear()
+            self._revoked.clear()
+            self._revoked_all = time.time()
+
+    def revoked(self, user_id: str, issued_at: float) -> bool:
+        """True if the user was invalidated at or after `issued_at` (epoch seconds)."""
+        with self._lock:
+            revoked_at = max(self._revoked.get(user_id, 0.0), self._revoked_all)
+        return issued_at <= revoked_at
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "revocations_tracked": len(self._revoked),
+            }
+
+
+user_cache = UserCache(
+    max_entries=int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000")),
+    ttl=float(os.getenv("USER_CACHE_TTL", "30")),
+    revocation_window=PERMISSION_CLAIM_SECONDS,
+)
+
+
+# ---------------------------
+# Invalidation on write
+# ---------------------------
+def _publish_invalidation(connection, user_id: str) -> None:
+    """Evict locally now and tell other workers once the transaction commits."""
+    user_cache.invalidate(user_id)
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("SELECT pg_notify(:channel, :user_id)"), {"channel": INVALIDATION_CHANNEL, "user_id": user_id})
+
+
+@event.listens_for(User, "after_update")
+def _user_updated(mapper, connection, target: User) -> None:
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in AUTH_FIELDS):
+        _publish_invalidation(connection, target.id)
+
+
+@event.listens_for(User, "after_delete")
+def _user_deleted(mapper, connection, target: User) -> None:
+    _publish_invalidation(connection, target.id)
+
+
+# ---------------------------
+# Cross-worker listener
+# ---------------------------
+class InvalidationListener:
+    """
+    Background thread that LISTENs on INVALIDATION_CHANNEL and evicts notified users.
+    The cache is cleared whenever the listening connection is (re)established,
+    since notifications sent while it was down are lost.
+    """
+
+    def __init__(self, engine, cache: UserCache):
+        self.engine = engine
+        self.cache = cache
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self.engine.dialect.name != "postgresql":
+            log.info("User cache: no LISTEN/NOTIFY on %s, relying on TTL only", self.engine.dialect.name)
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="user-cache-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            conn = None
+            try:
+                # Dedicated connection, detached so it does not count against the pool
+                conn = self.engine.raw_connection()
+                conn.detach()
+                dbapi = conn.driver_connection
+                dbapi.autocommit = True
+                with dbapi.cursor() as cur:
+                    cur.execute(f"LISTEN {INVALIDATION_CHANNEL}")
+                self.cache.clear()
+
+                while not self._stopped.is_set():
+                    if select.select([dbapi], [], [], 5) == ([], [], []):
+                        continue
+                    dbapi.poll()
+                    while dbapi.notifies:
+                        self.cache.invalidate(dbapi.notifies.pop(0).payload)
+            except Exception as e:
+                log.error("User cache listener error, reconnecting: %s", e)
+                self.cache.clear()
+                self._stopped.wait(5)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+
+invalidation_listener = InvalidationListener(engine, user_cache)
@@ -1,27 +1,72 @@
 from datetime import datetime, timedelta
 from jose import jwt
-from passlib.context import CryptContext
+from functools import lru_cache
+from typing import Optional, Tuple
 from app.models.user import User
+from app.services.password_pool import password_pool
+from app.utils.roles import permission_mask, PERMISSIONS_VERSION
 import os
+import time
 
 
 SECRET_KEY = os.getenv("JWT_SECRET")  # Replace with os.getenv("JWT_SECRET") in production
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
+# How long the role/permission claims in a token are trusted without checking the user row
+PERMISSION_CLAIM_SECONDS = int(os.getenv("PERMISSION_CLAIM_SECONDS", "300"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes with any other cost are flagged by verify_and_update and rehashed on the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
 
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    """The passlib context, built on first use so passlib stays out of application startup."""
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=BCRYPT_ROUNDS,
+        bcrypt__min_rounds=BCRYPT_ROUNDS,
+        bcrypt__max_rounds=BCRYPT_ROUNDS,
+    )
+
+def _hash(password: str) -> str:
+    return get_pwd_context().hash(password)
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return get_pwd_context().verify_and_update(plain_password, hashed_password)
+
+# All bcrypt work goes through password_pool; PoolBusy means the caller should back off (429)
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_pool.run("hash", _hash, password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_pool.run("verify", _verify, plain_password, hashed_password)
+
+async def hash_password_async(password: str) -> str:
+    return await password_pool.run_async("hash", _hash, password)
+
+async def verify_and_update_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """(valid, new hash or None); a new hash is returned when the stored one uses outdated cost settings."""
+    return await password_pool.run_async("verify", _verify_and_update, plain_password, hashed_password)
 
 def create_token(user: User) -> str:
+    now = int(time.time())
+    role = getattr(user.role, "value", user.role)
     payload = {
         "sub": user.id,
         "token_version": user.token_version,
-        "exp": datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        "iat": now,
+        "exp": datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+        # Permission claims: role bitmask, valid until perm_exp unless the user is revoked first
+        "role": role,
+        "perm": permission_mask(role),
+        "perm_v": PERMISSIONS_VERSION,
+        "perm_exp": now + PERMISSION_CLAIM_SECONDS,
     }
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
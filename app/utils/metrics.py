@@ -0,0 +1,10 @@
+from typing import Iterable
+
+
+def latency_summary(samples: Iterable[float]) -> dict:
+    """count / p50 / p95 / max in milliseconds for a window of durations in seconds."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0}
+    pct = lambda p: round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 2)
+    return {"count": len(ordered), "p50": pct(0.50), "p95": pct(0.95), "max": round(ordered[-1] * 1000, 2)}
@@ -1,13 +1,15 @@
 from io import BytesIO
-from PIL import Image, ImageDraw
-import qrcode
 from app.models.template import TicketTemplate
+from app.services.qr import render_qr
 
 def render_ticket(template: TicketTemplate, qr_data: str) -> BytesIO:
     """
     Render a ticket image from a TicketTemplate and QR data.
     Returns a PNG image buffer.
     """
+    # PIL is imported on first render to keep it out of application startup
+    from PIL import Image, ImageDraw
+
     # --- Load background ---
     if not template.background_file or not template.background_file.data:
         raise ValueError("Template is missing background file data")
@@ -30,19 +32,13 @@ def render_ticket(template: TicketTemplate, qr_data: str) -> BytesIO:
     output.seek(0)
     return output
 
-def _render_qr(data: str, width: int, height: int) -> Image.Image:
+def _render_qr(data: str, width: int, height: int) -> "Image.Image":
     """
     Generate a QR code image with transparent background.
     """
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_M,
-        box_size=10,
-        border=0
-    )
-    qr.add_data(data)
-    qr.make(fit=True)
+    from PIL import Image
 
-    qr_img = qr.make_image(fill_color="black", back_color="white").convert("RGBA")
+    png = render_qr(data, error_correction="M", box_size=10, border=0)
+    qr_img = Image.open(BytesIO(png)).convert("RGBA")
     qr_img = qr_img.resize((width, height), Image.LANCZOS)
     return qr_img
@@ -1,9 +1,32 @@
+import hashlib
+
 ROLE_PERMISSIONS = {
-    "admin": ["view_ticket", "scan_ticket", "create_user", "edit_ticket", "delete_ticket", "export", "verify_payment", "delete_user", "create_event"],
-    "subadmin": ["scan_ticket", "edit_ticket", "delete_ticket", "export"],
+    "admin": ["view_ticket", "scan_ticket", "create_user", "edit_ticket", "delete_ticket", "export", "verify_payment", "delete_user", "create_event", "import_tickets", "manage_admission", "view_metrics", "delete_event"],
+    "subadmin": ["scan_ticket", "edit_ticket", "delete_ticket", "export", "import_tickets"],
     "editor": ["scan_ticket", "edit_ticket"],
     "scanner": ["scan_ticket"]
 }
 
+# Bit positions are embedded in issued tokens: append new permissions, never reorder
+PERMISSIONS = (
+    "view_ticket", "scan_ticket", "create_user", "edit_ticket", "delete_ticket", "export",
+    "verify_payment", "delete_user", "create_event", "import_tickets", "manage_admission",
+    "view_metrics", "view_events", "delete_event",
+)
+PERMISSION_BITS = {name: 1 << i for i, name in enumerate(PERMISSIONS)}
+# Tokens carry this so masks minted against a different PERMISSIONS tuple are ignored
+PERMISSIONS_VERSION = hashlib.sha256(",".join(PERMISSIONS).encode()).hexdigest()[:8]
+
+ROLE_MASKS = {
+    role: sum(PERMISSION_BITS[name] for name in set(actions))
+    for role, actions in ROLE_PERMISSIONS.items()
+}
+
+def permission_mask(role: str) -> int:
+    return ROLE_MASKS.get(role, 0)
+
+def mask_allows(mask: int, action: str) -> bool:
+    return bool(mask & PERMISSION_BITS.get(action, 0))
+
 def has_permission(role: str, action: str) -> bool:
-    return action in ROLE_PERMISSIONS.get(role, [])
+    return mask_allows(permission_mask(role), action)
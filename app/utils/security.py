@@ -1,12 +1,11 @@
-from passlib.context import CryptContext
+from app.utils.auth import hash_password, verify_password as _verify_password
 
-# Configure Passlib to use bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Same bcrypt context and worker pool as app.utils.auth
 
 def get_password_hash(password: str) -> str:
     """Hash a plain-text password."""
-    return pwd_context.hash(password)
+    return hash_password(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain-text password against its hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return _verify_password(plain_password, hashed_password)
@@ -9,6 +9,7 @@ from app.models import ticket
 from app.models.user import User
 from app.models import template  # NEW — ensures TicketTemplate is picked up
 from app.models import file  # NEW
+from app.models import counter
 
 # Alembic Config object
 config = context.config
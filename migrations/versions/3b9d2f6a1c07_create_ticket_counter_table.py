@@ -0,0 +1,42 @@
+"""create ticket_counter table
+
+Revision ID: 3b9d2f6a1c07
+Revises: e0dfc92880db
+Create Date: 2026-10-18 09:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9d2f6a1c07'
+down_revision: Union[str, Sequence[str], None] = 'e0dfc92880db'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('ticket_counter',
+    sa.Column('scope', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('scope')
+    )
+    # Seed from the highest numeric ticket_number already issued
+    op.execute(
+        """
+        INSERT INTO ticket_counter (scope, value)
+        SELECT 'ticket', COALESCE(MAX(CAST(ticket_number AS INTEGER)), 0)
+        FROM ticket
+        WHERE ticket_number ~ '^[0-9]+$'
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('ticket_counter')
@@ -0,0 +1,98 @@
+"""scanned_at to timestamptz with (event, scanned_at) index
+
+Revision ID: 5c2e8a7d4f10
+Revises: 3b9d2f6a1c07
+Create Date: 2026-10-18 14:03:52.118640
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2e8a7d4f10'
+down_revision: Union[str, Sequence[str], None] = '3b9d2f6a1c07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH = 10000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    # Stored values are isoformat() strings; any without an offset were written as UTC
+    op.execute("SET LOCAL TIME ZONE 'UTC'")
+    op.execute(
+        """
+        CREATE FUNCTION pg_temp.try_timestamptz(value text) RETURNS timestamptz AS $$
+        BEGIN
+            RETURN value::timestamptz;
+        EXCEPTION WHEN others THEN
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql IMMUTABLE
+        """
+    )
+
+    # A value that does not parse would become NULL while used stays true, losing the scan time:
+    # stop before changing anything and name the tickets to fix by hand
+    unparsable = bind.execute(
+        sa.text(
+            "SELECT ticket_id, scanned_at FROM ticket "
+            "WHERE scanned_at IS NOT NULL AND pg_temp.try_timestamptz(scanned_at) IS NULL "
+            "ORDER BY ticket_id"
+        )
+    ).all()
+    if unparsable:
+        sample = ", ".join(f"{ticket_id}={scanned_at!r}" for ticket_id, scanned_at in unparsable[:20])
+        raise RuntimeError(
+            f"{len(unparsable)} ticket(s) have a scanned_at that is not a timestamp; "
+            f"correct or clear them and rerun the upgrade: {sample}"
+        )
+
+    op.add_column('ticket', sa.Column('scanned_at_ts', sa.DateTime(timezone=True), nullable=True))
+
+    # Backfill in ticket_id order, one batch per statement, so no single UPDATE touches the whole table
+    last_id = ""
+    while True:
+        last = bind.execute(
+            sa.text(
+                """
+                WITH batch AS (
+                    SELECT ticket_id FROM ticket
+                    WHERE ticket_id > :last_id AND scanned_at IS NOT NULL
+                    ORDER BY ticket_id
+                    LIMIT :batch
+                )
+                UPDATE ticket SET scanned_at_ts = pg_temp.try_timestamptz(ticket.scanned_at)
+                FROM batch WHERE ticket.ticket_id = batch.ticket_id
+                RETURNING ticket.ticket_id
+                """
+            ),
+            {"last_id": last_id, "batch": BACKFILL_BATCH},
+        ).scalars().all()
+        if not last:
+            break
+        last_id = max(last)
+
+    op.drop_column('ticket', 'scanned_at')
+    op.alter_column('ticket', 'scanned_at_ts', new_column_name='scanned_at')
+    op.create_index('ix_ticket_event_scanned_at', 'ticket', ['event', 'scanned_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_ticket_event_scanned_at', table_name='ticket')
+    op.execute("SET LOCAL TIME ZONE 'UTC'")
+    op.alter_column(
+        'ticket', 'scanned_at',
+        type_=sqlmodel.sql.sqltypes.AutoString(),
+        existing_type=sa.DateTime(timezone=True),
+        existing_nullable=True,
+        # Same shape as datetime.isoformat() on an aware UTC value
+        postgresql_using="""to_char(scanned_at, 'YYYY-MM-DD"T"HH24:MI:SS.US"+00:00"')""",
+    )
@@ -0,0 +1,52 @@
+"""restore ticket export indexes and add unique (id_card_number, event)
+
+Revision ID: 7e41b0c9d2a3
+Revises: 5c2e8a7d4f10
+Create Date: 2026-10-18 15:27:10.544903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e41b0c9d2a3'
+down_revision: Union[str, Sequence[str], None] = '5c2e8a7d4f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Dropped by 6dbe323b9017; export and live counters filter on event plus used / scanned_by
+    op.execute("CREATE INDEX IF NOT EXISTS ix_ticket_event_used ON ticket (event, used)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_ticket_event_scanned_by ON ticket (event, scanned_by)")
+    # Export by scanner across events, and the scanned_by -> user foreign key
+    op.create_index('ix_ticket_scanned_by', 'ticket', ['scanned_by'])
+
+    duplicates = op.get_bind().execute(sa.text(
+        """
+        SELECT id_card_number, event, COUNT(*) FROM ticket
+        WHERE id_card_number IS NOT NULL AND event IS NOT NULL
+        GROUP BY id_card_number, event HAVING COUNT(*) > 1
+        LIMIT 5
+        """
+    )).all()
+    if duplicates:
+        sample = ", ".join(f"({card!r}, {event!r}) x{count}" for card, event, count in duplicates)
+        raise RuntimeError(
+            f"Duplicate tickets per (id_card_number, event) must be resolved before this migration: {sample}"
+        )
+    # Registration duplicate check; also makes concurrent duplicate registrations fail in the database
+    op.create_index('uq_ticket_id_card_number_event', 'ticket', ['id_card_number', 'event'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_ticket_id_card_number_event', table_name='ticket')
+    op.drop_index('ix_ticket_scanned_by', table_name='ticket')
+    op.drop_index('ix_ticket_event_scanned_by', table_name='ticket')
+    op.drop_index('ix_ticket_event_used', table_name='ticket')
@@ -0,0 +1,115 @@
+"""add ticket.event_id foreign key to event, backfilled from ticket.event
+
+Revision ID: 9c3f5a1e7b22
+Revises: 7e41b0c9d2a3
+Create Date: 2026-10-18 16:42:31.207315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3f5a1e7b22'
+down_revision: Union[str, Sequence[str], None] = '7e41b0c9d2a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH = 10000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    # Until now the event table was only ever created by SQLModel.metadata.create_all at startup
+    if not sa.inspect(bind).has_table('event'):
+        op.create_table(
+            'event',
+            sa.Column('name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+            sa.Column('date', sa.Date(), nullable=False),
+            sa.Column('location', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+            sa.Column('id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index(op.f('ix_event_id'), 'event', ['id'], unique=False)
+
+    op.add_column('ticket', sa.Column('event_id', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    op.create_foreign_key(
+        'fk_ticket_event_id_event', 'ticket', 'event', ['event_id'], ['id'], ondelete='SET NULL'
+    )
+
+    # Free text matches an event by id, or by name when no other event shares that name
+    op.execute(
+        """
+        CREATE TEMP TABLE event_keys ON COMMIT DROP AS
+        SELECT id AS key, id AS event_id FROM event
+        UNION
+        SELECT name, min(id) FROM event
+        WHERE name NOT IN (SELECT id FROM event)
+        GROUP BY name HAVING count(*) = 1
+        """
+    )
+    op.execute("CREATE UNIQUE INDEX ON event_keys (key)")
+
+    # Backfill in ticket_id ranges, one batch per statement, so no single UPDATE touches the whole table
+    last_id = ""
+    while True:
+        upper = bind.execute(
+            sa.text(
+                """
+                SELECT max(ticket_id) FROM (
+                    SELECT ticket_id FROM ticket WHERE ticket_id > :last_id ORDER BY ticket_id LIMIT :batch
+                ) AS batch
+                """
+            ),
+            {"last_id": last_id, "batch": BACKFILL_BATCH},
+        ).scalar()
+        if upper is None:
+            break
+        bind.execute(
+            sa.text(
+                """
+                UPDATE ticket SET event_id = event_keys.event_id
+                FROM event_keys
+                WHERE ticket.event = event_keys.key
+                  AND ticket.ticket_id > :last_id AND ticket.ticket_id <= :upper
+                """
+            ),
+            {"last_id": last_id, "upper": upper},
+        )
+        last_id = upper
+
+    duplicates = bind.execute(sa.text(
+        """
+        SELECT id_card_number, event_id, COUNT(*) FROM ticket
+        WHERE id_card_number IS NOT NULL AND event_id IS NOT NULL
+        GROUP BY id_card_number, event_id HAVING COUNT(*) > 1
+        LIMIT 5
+        """
+    )).all()
+    if duplicates:
+        sample = ", ".join(f"({card!r}, {event_id!r}) x{count}" for card, event_id, count in duplicates)
+        raise RuntimeError(
+            "Tickets registered under both the id and the name of the same event must be resolved "
+            f"before this migration: {sample}"
+        )
+
+    op.create_index('ix_ticket_event_id_scanned_at', 'ticket', ['event_id', 'scanned_at'])
+    op.create_index('ix_ticket_event_id_used', 'ticket', ['event_id', 'used'])
+    op.create_index('ix_ticket_event_id_scanned_by', 'ticket', ['event_id', 'scanned_by'])
+    op.create_index('uq_ticket_id_card_number_event_id', 'ticket', ['id_card_number', 'event_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_ticket_id_card_number_event_id', table_name='ticket')
+    op.drop_index('ix_ticket_event_id_scanned_by', table_name='ticket')
+    op.drop_index('ix_ticket_event_id_used', table_name='ticket')
+    op.drop_index('ix_ticket_event_id_scanned_at', table_name='ticket')
+    op.drop_constraint('fk_ticket_event_id_event', 'ticket', type_='foreignkey')
+    op.drop_column('ticket', 'event_id')
+    # The event table is left in place: create_all made it on databases that predate this revision
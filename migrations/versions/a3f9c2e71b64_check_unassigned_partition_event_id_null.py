@@ -0,0 +1,38 @@
+"""constrain the default ticket partition to tickets without an event_id
+
+Revision ID: a3f9c2e71b64
+Revises: d7a1f4c8e305
+Create Date: 2026-10-18 21:12:40.318224
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f9c2e71b64'
+down_revision: Union[str, Sequence[str], None] = 'd7a1f4c8e305'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DEFAULT_PARTITION = 'ticket_unassigned'
+CHECK_NAME = 'ticket_unassigned_event_id_null'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # With this proof ATTACH PARTITION for a new event skips scanning the default partition.
+    # Every event has its own partition, so only unlinked tickets (event_id IS NULL) land here.
+    # NOT VALID + VALIDATE checks existing rows without blocking writes to the partition
+    op.execute(
+        f"ALTER TABLE {DEFAULT_PARTITION} ADD CONSTRAINT {CHECK_NAME} CHECK (event_id IS NULL) NOT VALID"
+    )
+    op.execute(f"ALTER TABLE {DEFAULT_PARTITION} VALIDATE CONSTRAINT {CHECK_NAME}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(f"ALTER TABLE {DEFAULT_PARTITION} DROP CONSTRAINT IF EXISTS {CHECK_NAME}")
@@ -0,0 +1,135 @@
+"""partition ticket by LIST (event_id), one partition per event
+
+Revision ID: b5e8d2c41f93
+Revises: 9c3f5a1e7b22
+Create Date: 2026-10-18 18:05:47.631920
+
+"""
+import hashlib
+import uuid
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e8d2c41f93'
+down_revision: Union[str, Sequence[str], None] = '9c3f5a1e7b22'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COPY_BATCH = 10000
+DEFAULT_PARTITION = 'ticket_unassigned'
+
+# Indexes on the partitioned parent, created on every partition including future ones.
+# A unique index on the parent must contain the partition key, so only (id_card_number, event_id) stays unique there.
+PARENT_INDEXES = [
+    ('ix_ticket_event_scanned_at', ['event', 'scanned_at'], False),
+    ('ix_ticket_event_used', ['event', 'used'], False),
+    ('ix_ticket_event_scanned_by', ['event', 'scanned_by'], False),
+    ('ix_ticket_scanned_by', ['scanned_by'], False),
+    ('ix_ticket_event_id_scanned_at', ['event_id', 'scanned_at'], False),
+    ('ix_ticket_event_id_used', ['event_id', 'used'], False),
+    ('ix_ticket_event_id_scanned_by', ['event_id', 'scanned_by'], False),
+    ('uq_ticket_id_card_number_event_id', ['id_card_number', 'event_id'], True),
+]
+
+
+def _partition_name(event_id: str) -> str:
+    # Same naming as app/db/partitions.partition_name
+    try:
+        suffix = uuid.UUID(event_id).hex
+    except ValueError:
+        suffix = hashlib.md5(event_id.encode('utf-8')).hexdigest()
+    return 'ticket_e_' + suffix
+
+
+def _partition_keys(name: str) -> None:
+    # ticket_id and ticket_number are generated, so per-partition uniqueness is enough
+    op.execute(f"ALTER TABLE {name} ADD CONSTRAINT {name}_pkey PRIMARY KEY (ticket_id)")
+    op.execute(f"CREATE UNIQUE INDEX {name}_ticket_number ON {name} (ticket_number)")
+
+
+def _foreign_keys() -> None:
+    op.create_foreign_key('ticket_scanned_by_fkey', 'ticket', 'user', ['scanned_by'], ['id'])
+    op.create_foreign_key(
+        'fk_ticket_event_id_event', 'ticket', 'event', ['event_id'], ['id'], ondelete='SET NULL'
+    )
+
+
+def _copy(bind, source: str) -> None:
+    """INSERT ... SELECT in ticket_id ranges, so no single statement carries the whole table."""
+    last_id = ""
+    while True:
+        upper = bind.execute(
+            sa.text(
+                f"""
+                SELECT max(ticket_id) FROM (
+                    SELECT ticket_id FROM {source} WHERE ticket_id > :last_id ORDER BY ticket_id LIMIT :batch
+                ) AS batch
+                """
+            ),
+            {"last_id": last_id, "batch": COPY_BATCH},
+        ).scalar()
+        if upper is None:
+            break
+        bind.execute(
+            sa.text(f"INSERT INTO ticket SELECT * FROM {source} WHERE ticket_id > :last_id AND ticket_id <= :upper"),
+            {"last_id": last_id, "upper": upper},
+        )
+        last_id = upper
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    # The RENAME below takes ACCESS EXCLUSIVE until the migration commits: every read and write
+    # of ticket blocks for the whole copy, so run this in a maintenance window
+    op.execute("LOCK TABLE ticket IN EXCLUSIVE MODE")
+    op.execute("ALTER TABLE ticket RENAME TO ticket_unpartitioned")
+    op.execute(
+        "CREATE TABLE ticket (LIKE ticket_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        "PARTITION BY LIST (event_id)"
+    )
+
+    # Tickets without an event_id (free-text events matching no single event)
+    op.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF ticket DEFAULT")
+    _partition_keys(DEFAULT_PARTITION)
+    op.execute(
+        f"CREATE UNIQUE INDEX {DEFAULT_PARTITION}_id_card_number_event ON {DEFAULT_PARTITION} (id_card_number, event)"
+    )
+
+    for event_id in bind.execute(sa.text("SELECT id FROM event ORDER BY id")).scalars().all():
+        name = _partition_name(event_id)
+        bound = event_id.replace("'", "''")  # partition bounds are DDL, which takes no bind parameters
+        op.execute(f"CREATE TABLE {name} PARTITION OF ticket FOR VALUES IN ('{bound}')")
+        _partition_keys(name)
+
+    _copy(bind, 'ticket_unpartitioned')
+    op.execute("DROP TABLE ticket_unpartitioned")
+
+    # Built once over the copied rows rather than maintained row by row during the copy
+    for name, columns, unique in PARENT_INDEXES:
+        op.create_index(name, 'ticket', columns, unique=unique)
+    _foreign_keys()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    op.execute("LOCK TABLE ticket IN EXCLUSIVE MODE")
+    op.execute("ALTER TABLE ticket RENAME TO ticket_partitioned")
+    op.execute("CREATE TABLE ticket (LIKE ticket_partitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    _copy(bind, 'ticket_partitioned')
+    op.execute("DROP TABLE ticket_partitioned")
+
+    op.create_primary_key('ticket_pkey', 'ticket', ['ticket_id'])
+    op.create_index(op.f('ix_ticket_ticket_id'), 'ticket', ['ticket_id'], unique=False)
+    op.create_index(op.f('ix_ticket_ticket_number'), 'ticket', ['ticket_number'], unique=True)
+    op.create_index('uq_ticket_id_card_number_event', 'ticket', ['id_card_number', 'event'], unique=True)
+    for name, columns, unique in PARENT_INDEXES:
+        op.create_index(name, 'ticket', columns, unique=unique)
+    _foreign_keys()
+    # Partitions detached for deleted events are standalone tables and are left as they are
@@ -0,0 +1,34 @@
+"""add keyset pagination index on (event, ticket_number, ticket_id)
+
+Revision ID: d7a1f4c8e305
+Revises: b5e8d2c41f93
+Create Date: 2026-10-18 19:31:08.472615
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a1f4c8e305'
+down_revision: Union[str, Sequence[str], None] = 'b5e8d2c41f93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Must match the sort key of order=event pages; ticket_id-ordered pages use the primary keys
+    op.create_index(
+        'ix_ticket_page_event',
+        'ticket',
+        [sa.text("coalesce(event, '')"), sa.text("coalesce(ticket_number, '')"), 'ticket_id'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_ticket_page_event', table_name='ticket')
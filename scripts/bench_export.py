@@ -0,0 +1,81 @@
+"""
+Export benchmark: time to first byte, total time and size of /admin/export
+in each format against a running API.
+
+The JSON export builds the whole list before sending anything; the streamed
+formats should send their first byte at once and keep the server's memory
+flat however many rows match (watch the server's RSS while this runs).
+
+    python scripts/bench_export.py --base-url http://localhost:8000/api \
+        --email admin@example.com --password admin1234 --seed 50000 --qr none
+"""
+import argparse
+import time
+from uuid import uuid4
+
+import httpx
+
+
+# --- Helpers ---
+def login(client, email, password):
+    res = client.post("/admin/login", json={"email": email, "password": password})
+    res.raise_for_status()
+    print(f"✅ Logged in as {email}")
+    return res.json()["access_token"]
+
+def seed(client, token, count, event):
+    rows = "\n".join(
+        f'{{"name": "Export {i}", "id_card_number": "{uuid4().hex[:12]}", "event": "{event}"}}'
+        for i in range(count)
+    )
+    res = client.post(
+        "/tickets/bulk",
+        content=rows,
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/x-ndjson"},
+        timeout=600,
+    )
+    res.raise_for_status()
+    print(f"🌱 Seeded {count} tickets for event {event!r}")
+
+def measure(client, token, params):
+    started = time.perf_counter()
+    first_byte = None
+    size = 0
+    with client.stream(
+        "GET", "/admin/export", params=params, headers={"Authorization": f"Bearer {token}"}, timeout=600,
+    ) as res:
+        res.raise_for_status()
+        for chunk in res.iter_bytes():
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+            size += len(chunk)
+    return first_byte or 0.0, time.perf_counter() - started, size
+
+
+# --- Main ---
+def main(args):
+    with httpx.Client(base_url=args.base_url) as client:
+        token = login(client, args.email, args.password)
+        event = args.event or f"export-bench-{uuid4().hex[:6]}"
+        if args.seed:
+            seed(client, token, args.seed, event)
+
+        print(f"\n{'format':>8} {'first byte':>12} {'total':>10} {'size':>12}")
+        for fmt in args.formats:
+            params = {"format": fmt, "qr": args.qr}
+            if args.event or args.seed:
+                params["event"] = event
+            ttfb, total, size = measure(client, token, params)
+            print(f"{fmt:>8} {ttfb * 1000:>10.0f}ms {total:>9.2f}s {size / 1e6:>10.1f}MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000/api")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--seed", type=int, default=0, help="bulk-import this many tickets first")
+    parser.add_argument("--event", help="export this event (default: the seeded one, or everything)")
+    parser.add_argument("--qr", choices=["inline", "url", "none"], default="none")
+    parser.add_argument("--formats", nargs="+", default=["json", "ndjson", "csv"], help="also parquet and arrow with pyarrow on the server")
+    main(parser.parse_args())
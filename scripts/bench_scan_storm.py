@@ -0,0 +1,115 @@
+"""
+Scan-storm benchmark: fire concurrent gate scans at a running API and
+report throughput and latency per concurrency level.
+
+Run it against a build with sync scan routes and one with the async routes
+to compare; with sync routes throughput flattens once concurrency passes
+the threadpool size (40 by default), with async routes it keeps climbing
+until the database pool is the limit.
+
+    python scripts/bench_scan_storm.py --base-url http://localhost:8000/api \
+        --email admin@example.com --password admin1234 --levels 10 50 200 --scans 2000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from uuid import uuid4
+
+import httpx
+
+
+# --- Helpers ---
+async def login(client, email, password):
+    res = await client.post("/admin/login", json={"email": email, "password": password})
+    res.raise_for_status()
+    print(f"✅ Logged in as {email}")
+    return res.json()["access_token"]
+
+async def create_tickets(client, token, count, event):
+    """Create fresh, unused tickets so every scan in the storm does a real check-in."""
+    headers = {"Authorization": f"Bearer {token}"}
+    rows = "\n".join(
+        f'{{"name": "Bench {i}", "id_card_number": "{uuid4().hex[:12]}", "event": "{event}"}}'
+        for i in range(count)
+    )
+    res = await client.post(
+        "/tickets/bulk",
+        content=rows,
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+        timeout=300,
+    )
+    if res.status_code == 404:
+        # Older builds without bulk import
+        ids = []
+        for i in range(count):
+            r = await client.post("/tickets", json={"name": f"Bench {i}", "id_card_number": uuid4().hex[:12], "event": event})
+            r.raise_for_status()
+            ids.append(r.json()["ticket_id"])
+        return ids
+
+    res.raise_for_status()
+    return [r["ticket_id"] for r in map(json.loads, res.text.splitlines()) if r.get("status") == "created"]
+
+async def storm(client, token, ticket_ids, concurrency, lean):
+    headers = {"Authorization": f"Bearer {token}"}
+    params = {"fields": "lean"} if lean else {}
+    queue = asyncio.Queue()
+    for ticket_id in ticket_ids:
+        queue.put_nowait(ticket_id)
+
+    latencies = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while True:
+            try:
+                ticket_id = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            try:
+                res = await client.post(f"/scan/{ticket_id}", headers=headers, params=params)
+                if res.status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return elapsed, latencies, errors
+
+def report(concurrency, elapsed, latencies, errors):
+    latencies = sorted(latencies)
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+    print(
+        f"📊 concurrency={concurrency:<4} scans={len(latencies):<6} "
+        f"throughput={len(latencies) / elapsed:8.1f}/s "
+        f"p50={pct(0.50):7.1f}ms p95={pct(0.95):7.1f}ms p99={pct(0.99):7.1f}ms "
+        f"mean={statistics.mean(latencies) * 1000:7.1f}ms errors={errors}"
+    )
+
+async def main(args):
+    limits = httpx.Limits(max_connections=max(args.levels), max_keepalive_connections=max(args.levels))
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        token = await login(client, args.email, args.password)
+        event = f"bench-{uuid4().hex[:8]}"
+        for concurrency in args.levels:
+            ticket_ids = await create_tickets(client, token, args.scans, event)
+            print(f"🎟️ {len(ticket_ids)} tickets ready for concurrency {concurrency}")
+            report(concurrency, *await storm(client, token, ticket_ids, concurrency, args.lean))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000/api")
+    parser.add_argument("--email", default="admin@example.com")
+    parser.add_argument("--password", default="admin1234")
+    parser.add_argument("--levels", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--scans", type=int, default=2000, help="scans per concurrency level")
+    parser.add_argument("--lean", action="store_true", help="use ?fields=lean responses")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,194 @@
+"""
+Query-plan regression check for the ticket query shapes used by the API.
+
+Copies the ticket table definition (with all its indexes) into a scratch
+schema, seeds it with --rows synthetic tickets, runs EXPLAIN on each query
+shape and exits with code 1 if any of them plans a sequential scan of ticket.
+When ticket is partitioned by event, the copy gets one partition per synthetic
+event, and queries for one event must also be pruned to a single partition.
+The scratch schema is dropped afterwards; the real table is never written.
+
+Requires Postgres with the schema migrated to head:
+
+    DATABASE_URL=postgresql://... python scripts/check_query_plans.py --rows 500000
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, delete, text, func, tuple_, update
+from sqlalchemy.dialects import postgresql
+from sqlmodel import select
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.db.partitions import DEFAULT_PARTITION, PREFIX, default_partition_ddl, is_partitioned, partition_ddl  # noqa: E402
+from app.models.ticket import Ticket  # noqa: E402
+from app.services.pagination import DEFAULT_PAGE_SIZE, order_columns  # noqa: E402
+
+SCHEMA = "plan_check"
+EVENTS = 200
+SCANNERS = 20
+
+SEED = f"""
+INSERT INTO {SCHEMA}.ticket (ticket_id, ticket_number, name, id_card_number, event, event_id, used, scanned_at, scanned_by)
+SELECT md5(i::text)::uuid::text,
+       lpad(i::text, 8, '0'),
+       'Guest ' || i,
+       'ID' || i,
+       'event-' || (i % {EVENTS}),
+       'event-' || (i % {EVENTS}),
+       i % 3 = 0,
+       CASE WHEN i % 3 = 0 THEN now() - (i % 86400) * interval '1 second' END,
+       CASE WHEN i % 3 = 0 THEN 'scanner-' || (i % {SCANNERS}) END
+FROM generate_series(1, :rows) AS i
+"""
+
+
+def query_shapes():
+    """The WHERE clauses the API actually sends, built the way the routes build them."""
+    now = datetime.now(timezone.utc)
+    return {
+        "create_ticket duplicate check": select(Ticket.ticket_id).where(
+            (Ticket.id_card_number == "ID42") & (Ticket.event_id == "event-42")
+        ),
+        "create_ticket duplicate check, unlinked event": select(Ticket.ticket_id).where(
+            (Ticket.id_card_number == "ID42") & (Ticket.event == "event-42")
+        ),
+        "get / scan ticket by id": select(Ticket).where(Ticket.ticket_id == "00000000-0000-0000-0000-000000000000"),
+        "scan ticket by id at an event's gate": select(Ticket).where(
+            Ticket.ticket_id == "00000000-0000-0000-0000-000000000000", Ticket.event_id == "event-7"
+        ),
+        "conditional scan update": update(Ticket)
+            .where(Ticket.ticket_id == "00000000-0000-0000-0000-000000000000", Ticket.used == False)  # noqa: E712
+            .values(used=True),
+        "export by event and used": select(Ticket).where(Ticket.used == True, Ticket.event_id == "event-7"),  # noqa: E712
+        "export by event and scanner": select(Ticket).where(Ticket.event_id == "event-7", Ticket.scanned_by == "scanner-3"),
+        "export by scanner": select(Ticket).where(Ticket.scanned_by == "scanner-3"),
+        "export hourly window for an event": select(Ticket).where(
+            Ticket.event_id == "event-7",
+            Ticket.scanned_at >= now - timedelta(hours=1),
+            Ticket.scanned_at <= now,
+        ),
+        "live counters per scanner": select(Ticket.scanned_by, func.count())
+            .where(Ticket.event_id == "event-7", Ticket.used == True)  # noqa: E712
+            .group_by(Ticket.scanned_by),
+        "live recent scans": select(Ticket.ticket_id, Ticket.scanned_at)
+            .where(Ticket.event_id == "event-7", Ticket.used == True)  # noqa: E712
+            .order_by(Ticket.scanned_at.desc())
+            .limit(20),
+        "offline manifest": select(Ticket.ticket_id, Ticket.used).where(Ticket.event_id == "event-7"),
+        "delete an event's tickets": delete(Ticket).where(Ticket.event_id == "event-7"),
+        "deep page by ticket_id": select(Ticket)
+            .where(Ticket.ticket_id > "c0000000-0000-0000-0000-000000000000")
+            .order_by(*order_columns("ticket_id"))
+            .limit(DEFAULT_PAGE_SIZE + 1),
+        "deep page by event": select(Ticket)
+            .where(tuple_(*order_columns("event")) > tuple_("event-150", "00150000", ""))
+            .order_by(*order_columns("event"))
+            .limit(DEFAULT_PAGE_SIZE + 1),
+    }
+
+
+# Shapes filtered on one event_id; on a partitioned table they must touch a single partition
+SINGLE_EVENT = {
+    "create_ticket duplicate check",
+    "scan ticket by id at an event's gate",
+    "export by event and used",
+    "export by event and scanner",
+    "export hourly window for an event",
+    "live counters per scanner",
+    "live recent scans",
+    "offline manifest",
+    "delete an event's tickets",
+}
+
+
+def is_ticket(relation):
+    return relation == "ticket" or relation.startswith(PREFIX) or relation == DEFAULT_PARTITION
+
+
+def seq_scans(plan, found=None):
+    found = [] if found is None else found
+    if plan.get("Node Type") == "Seq Scan" and is_ticket(plan.get("Relation Name", "")):
+        found.append(plan)
+    for child in plan.get("Plans", []):
+        seq_scans(child, found)
+    return found
+
+
+def partitions(plan, found=None):
+    found = set() if found is None else found
+    relation = plan.get("Relation Name", "")
+    if relation.startswith(PREFIX) or relation == DEFAULT_PARTITION:
+        found.add(relation)
+    for child in plan.get("Plans", []):
+        partitions(child, found)
+    return found
+
+
+def create_scratch_table(conn):
+    """Plain copy of ticket, or a partitioned one with a partition per synthetic event."""
+    if not is_partitioned(conn):
+        # LIKE ... INCLUDING ALL copies the migrated indexes but not foreign keys
+        conn.execute(text(f"CREATE TABLE {SCHEMA}.ticket (LIKE public.ticket INCLUDING ALL)"))
+        return False
+    conn.execute(text(f"CREATE TABLE {SCHEMA}.ticket (LIKE public.ticket INCLUDING ALL) PARTITION BY LIST (event_id)"))
+    conn.execute(text(f"SET search_path TO {SCHEMA}"))
+    for statement in default_partition_ddl() + [s for i in range(EVENTS) for s in partition_ddl(f"event-{i}")]:
+        conn.execute(text(statement))
+    conn.execute(text("SET search_path TO public"))
+    return True
+
+
+def main(args):
+    engine = create_engine(os.environ["DATABASE_URL"])
+    failures = []
+    with engine.connect() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        partitioned = create_scratch_table(conn)
+        conn.execute(text(SEED), {"rows": args.rows})
+        conn.execute(text(f"ANALYZE {SCHEMA}.ticket"))
+        conn.execute(text(f"SET search_path TO {SCHEMA}"))
+        layout = f"{EVENTS} partitions" if partitioned else "one table"
+        print(f"🌱 Seeded {args.rows} tickets across {EVENTS} events ({layout})")
+
+        try:
+            for name, stmt in query_shapes().items():
+                sql = str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+                plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+                plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+                scans = seq_scans(plan)
+                touched = partitions(plan)
+                if scans:
+                    failures.append(name)
+                    print(f"❌ {name}: sequential scan of ticket")
+                    if args.verbose:
+                        print(json.dumps(plan, indent=2))
+                elif partitioned and name in SINGLE_EVENT and len(touched) > 1:
+                    failures.append(name)
+                    print(f"❌ {name}: not pruned, touches {len(touched)} partitions")
+                    if args.verbose:
+                        print(json.dumps(plan, indent=2))
+                else:
+                    print(f"✅ {name}: {plan['Node Type']}, est. cost {plan['Total Cost']:.0f}")
+        finally:
+            conn.execute(text("SET search_path TO public"))
+            if not args.keep:
+                conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+            conn.commit()
+
+    if failures:
+        print(f"❌ {len(failures)} query shape(s) fall back to a sequential scan or miss partition pruning")
+        sys.exit(1)
+    print("✅ every query shape uses an index")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--keep", action="store_true", help="keep the seeded scratch schema for inspection")
+    parser.add_argument("--verbose", action="store_true", help="print the plan of failing queries")
+    main(parser.parse_args())
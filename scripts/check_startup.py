@@ -0,0 +1,103 @@
+"""
+Cold-start regression check.
+
+Imports app.main in a fresh interpreter and fails (exit code 1) if
+- the import takes longer than --budget-ms,
+- a module that should load lazily (PIL, qrcode, passlib, alembic, pyarrow) is imported at startup,
+- the startup schema check disagrees with alembic about the migration head.
+
+    DATABASE_URL=sqlite:///./dev.db JWT_SECRET=dev python scripts/check_startup.py --budget-ms 1500
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+LAZY_MODULES = ["PIL", "qrcode", "passlib", "alembic", "pyarrow"]
+
+PROBE = """
+import sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print("elapsed=" + str(elapsed))
+print("eager=" + ",".join(m for m in {lazy!r} if m in sys.modules))
+"""
+
+
+def run_probe(env, importtime=False):
+    flags = ["-X", "importtime"] if importtime else []
+    res = subprocess.run(
+        [sys.executable, *flags, "-c", PROBE.format(lazy=LAZY_MODULES)],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if res.returncode != 0:
+        print(res.stderr)
+        raise SystemExit("❌ import app.main failed")
+    values = dict(line.split("=", 1) for line in res.stdout.splitlines() if line.startswith(("elapsed=", "eager=")))
+    return float(values["elapsed"]), [m for m in values["eager"].split(",") if m], res.stderr
+
+def slowest_imports(importtime_log, top):
+    rows = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            rows.append((int(cumulative), name.strip()))
+        except ValueError:
+            continue
+    return sorted(rows, reverse=True)[:top]
+
+def check_heads():
+    sys.path.insert(0, str(ROOT))
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+    from app.db.schema import migration_heads
+
+    expected = set(ScriptDirectory.from_config(Config(str(ROOT / "alembic.ini"))).get_heads())
+    started = time.perf_counter()
+    ours = migration_heads()
+    return ours, expected, time.perf_counter() - started
+
+def main(args):
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///" + str(ROOT / "startup_check.db"))
+    env.setdefault("JWT_SECRET", "startup-check")
+    os.environ.update({k: env[k] for k in ("DATABASE_URL", "JWT_SECRET")})
+
+    failures = []
+    timings = []
+    for _ in range(args.runs):
+        elapsed, eager, _ = run_probe(env)
+        timings.append(elapsed)
+    best = min(timings) * 1000
+    print(f"⏱️ import app.main: best {best:.0f} ms over {args.runs} runs (budget {args.budget_ms} ms)")
+    _, _, log = run_probe(env, importtime=True)
+    for cumulative, name in slowest_imports(log, args.top):
+        print(f"   {cumulative / 1000:8.1f} ms  {name}")
+    if best > args.budget_ms:
+        failures.append(f"import took {best:.0f} ms")
+    if eager:
+        failures.append(f"imported eagerly: {', '.join(eager)}")
+
+    ours, expected, parse_time = check_heads()
+    print(f"🧭 migration head {sorted(ours)} (alembic: {sorted(expected)}), parsed in {parse_time * 1000:.1f} ms")
+    if ours != expected:
+        failures.append("migration head mismatch")
+
+    if failures:
+        print("❌ " + "; ".join(failures))
+        sys.exit(1)
+    print("✅ startup checks passed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=1500)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    main(parser.parse_args())